@@ -1,13 +1,25 @@
-from fastapi import Depends, HTTPException, status
+import os
+import time
+from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
+from app.services.cache import TTLCache
+
 SECRET_KEY = "junior-secret-key"
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+# Tokens já verificados, válidos até o próprio exp
+verified_tokens = TTLCache(maxsize=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")), ttl=300, name="auth_tokens")
+
+def authenticate_token(token: str) -> dict:
+    """Usuário do JWT (cacheado até o exp); HTTPException 401 se inválido"""
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        return cached
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -18,6 +30,27 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        return {"username": username}
     except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+    
+    user = {"username": username}
+    expires_at = payload.get("exp")
+    if expires_at is None:
+        verified_tokens.set(token, user)
+    elif expires_at > time.time():
+        verified_tokens.set(token, user, ttl=expires_at - time.time())
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return authenticate_token(token)
+
+async def get_websocket_user(websocket: WebSocket):
+    # Navegadores não mandam cabeçalhos no handshake do WebSocket: aceita também ?token=
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        return authenticate_token(token or "")
+    except HTTPException:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
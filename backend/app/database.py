@@ -1,13 +1,90 @@
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.dialects import postgresql, sqlite
 import os
+import time
 
 # PostgreSQL async
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://invest:investpw@db:5432/investdb")
+# Réplica somente leitura para as rotas GET (por padrão, o próprio primário)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+
+class PoolMetrics:
+    """Checkouts e tempo de espera por conexão de um pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.timeouts += int(timed_out)
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """QueuePool que mede quanto cada checkout esperou por uma conexão livre"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+def create_engine_from_env(url: str):
+    """Engine assíncrona com pool e cache de statements configurados por variáveis de ambiente"""
+    url = make_url(url)
+    options = {"echo": DB_ECHO}
+    
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=InstrumentedPool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    
+    if url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+        options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    
+    async_engine = create_async_engine(url, **options)
+    if url.get_backend_name() == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return async_engine
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # O SQLite só aplica FOREIGN KEY com o pragma ligado, e ele vale por conexão
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+engine = create_engine_from_env(DATABASE_URL)
+read_engine = engine if DATABASE_READ_URL == DATABASE_URL else create_engine_from_env(DATABASE_READ_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 async def get_session() -> AsyncSession:
@@ -17,6 +94,52 @@ async def get_session() -> AsyncSession:
         finally:
             await session.close()
 
+async def get_read_session() -> AsyncSession:
+    """Sessão para leituras (listas, resumos, exportações), roteada para a réplica
+
+    Não use em rotas que preenchem caches por versão (VersionedCache / ResponseCache):
+    a versão é incrementada logo após o commit no primário, e uma réplica atrasada
+    devolveria dados anteriores à escrita, que ficariam em cache sob a versão nova.
+    """
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+def pool_stats() -> dict:
+    """Ocupação e espera por conexão dos pools do primário e da réplica"""
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    
+    stats = {}
+    for role, role_engine in engines.items():
+        pool = role_engine.pool
+        entry = {"pool": pool.__class__.__name__, "status": pool.status()}
+        if isinstance(pool, InstrumentedPool):
+            capacity = pool.size() + pool._max_overflow
+            checked_out = pool.checkedout()
+            entry.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=checked_out,
+                overflow=pool.overflow(),
+                saturation=checked_out / capacity if capacity else 0.0,
+                checkouts=pool.metrics.checkouts,
+                checkout_timeouts=pool.metrics.timeouts,
+                checkout_wait_seconds_total=pool.metrics.wait_seconds,
+                checkout_wait_seconds_max=pool.metrics.max_wait_seconds,
+            )
+        stats[role] = entry
+    return stats
+
 async def create_tables():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+
+def dialect_insert(session, table):
+    """INSERT do dialeto em uso, com suporte a ON CONFLICT (PostgreSQL e SQLite)"""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -1,9 +1,27 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.routes import clients, assets, movements, auth
+from app.database import pool_stats
+from app.metrics import MetricsMiddleware, render_metrics
+from app.routes import clients, assets, movements, auth, dashboard, portfolio, exports, imports, stream
+from app.services.price_stream import price_hub
+from app.services.price_scheduler import PRICE_REFRESH_ENABLED, price_scheduler
 
-app = FastAPI(title="InvestCase API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Atualização periódica dos preços dos ativos em carteira
+    if PRICE_REFRESH_ENABLED:
+        price_scheduler.start()
+    yield
+    # Encerra as tarefas de fundo antes de fechar o loop
+    await price_scheduler.stop()
+    await price_hub.stop()
+
+app = FastAPI(title="InvestCase API", version="1.0.0", lifespan=lifespan)
 
 # Configurar CORS
 app.add_middleware(
@@ -14,11 +32,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão das respostas grandes (listas e exportações)
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")))
+
+# Latência e número de queries por rota
+app.add_middleware(MetricsMiddleware)
+
 # Incluir rotas
 app.include_router(auth.router, prefix="/api")
 app.include_router(clients.router, prefix="/api")
 app.include_router(assets.router, prefix="/api")
 app.include_router(movements.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(portfolio.router, prefix="/api")
+app.include_router(exports.router, prefix="/api")
+app.include_router(imports.router, prefix="/api")
+app.include_router(stream.router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -33,6 +62,16 @@ async def health_check():
 async def api_health_check():
     return {"status": "api-healthy"}
 
+@app.get("/api/health/db")
+async def db_pool_health():
+    """Ocupação dos pools de conexão e tempo de espera por checkout"""
+    return pool_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas no formato do Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Rota para listar todas as rotas disponíveis
 @app.get("/routes")
 async def list_routes():
@@ -0,0 +1,234 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.database import engine, read_engine, pool_stats
+from app.services.cache import cache_stats
+from app.services.price_stream import price_hub
+from app.services.price_scheduler import price_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalhos X-DB-* nas respostas (somente em debug)
+METRICS_DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+# Acima deste número de queries por requisição a rota é logada (provável N+1)
+QUERY_COUNT_WARN_THRESHOLD = int(os.getenv("QUERY_COUNT_WARN_THRESHOLD", "50"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus, uma série por conjunto de labels"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._series = defaultdict(lambda: [[0] * (len(self.buckets) + 1), 0.0])
+
+    def observe(self, labels: tuple, value: float):
+        counts, _ = series = self._series[labels]
+        counts[bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def totals(self, labels: tuple) -> tuple:
+        """(observações, soma) de uma série"""
+        counts, total = self._series.get(labels, ((), 0.0))
+        return sum(counts), total
+
+    def samples(self):
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield labels, "+Inf" if bound == float("inf") else repr(bound), cumulative
+            yield labels, None, (cumulative, total)
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "_started")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self._started = []
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+request_latency = Histogram(LATENCY_BUCKETS)
+request_queries = Histogram(QUERY_COUNT_BUCKETS)
+db_seconds_total = defaultdict(float)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats._started.append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None and stats._started:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - stats._started.pop()
+
+def install_query_hooks(*engines):
+    """Conta queries e tempo de banco da requisição corrente em cada engine"""
+    for target in {id(e): e for e in engines}.values():
+        sync_engine = target.sync_engine
+        if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência, número de queries e tempo de banco por rota"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route_path(self, scope) -> str:
+        # Usa o template da rota ("/api/clients/{client_id}") para não explodir a cardinalidade
+        if self._route_paths is None:
+            self._route_paths = {
+                getattr(route, "endpoint", None): route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if METRICS_DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.queries).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.db_seconds * 1000:.2f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route = self._route_path(scope)
+            request_latency.observe((scope["method"], route, str(status_code)), elapsed)
+            request_queries.observe((scope["method"], route), stats.queries)
+            db_seconds_total[(scope["method"], route)] += stats.db_seconds
+            if stats.queries > QUERY_COUNT_WARN_THRESHOLD:
+                logger.warning(
+                    "%s %s executou %d queries (limite %d, %.1f ms no banco)",
+                    scope["method"], route, stats.queries, QUERY_COUNT_WARN_THRESHOLD, stats.db_seconds * 1000,
+                )
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _render_histogram(lines, name, help_text, histogram, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, bound, value in histogram.samples():
+        if bound is None:
+            count, total = value
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {total}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {count}")
+        else:
+            le = 'le="%s"' % bound
+            lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {value}")
+
+def render_metrics() -> str:
+    """Todas as métricas no formato texto de exposição do Prometheus"""
+    lines = []
+    _render_histogram(lines, "http_request_duration_seconds", "Latência das requisições HTTP por rota",
+                      request_latency, ("method", "route", "status"))
+    _render_histogram(lines, "http_request_db_queries", "Queries SQL executadas por requisição",
+                      request_queries, ("method", "route"))
+
+    lines.append("# HELP http_request_db_seconds_total Tempo gasto no banco por rota")
+    lines.append("# TYPE http_request_db_seconds_total counter")
+    for labels, seconds in sorted(db_seconds_total.items()):
+        lines.append(f"http_request_db_seconds_total{_labels(('method', 'route'), labels)} {seconds}")
+
+    pool_metrics = {
+        "checked_out": ("gauge", "Conexões em uso"),
+        "overflow": ("gauge", "Conexões acima do pool_size"),
+        "saturation": ("gauge", "Fração da capacidade do pool em uso"),
+        "checkouts": ("counter", "Checkouts de conexão"),
+        "checkout_timeouts": ("counter", "Checkouts que estouraram o pool_timeout"),
+        "checkout_wait_seconds_total": ("counter", "Tempo total esperando por conexão"),
+    }
+    pools = pool_stats()
+    for key, (kind, help_text) in pool_metrics.items():
+        name = f"db_pool_{key}" + ("_total" if kind == "counter" and not key.endswith("_total") else "")
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for role, entry in pools.items():
+            if key in entry:
+                lines.append(f"{name}{_labels(('role',), (role,))} {entry[key]}")
+
+    caches = cache_stats()
+    for key, kind in (("hits", "counter"), ("misses", "counter"), ("size", "gauge")):
+        name = f"cache_{key}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {name} Caches em memória: {key}")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, entry in sorted(caches.items()):
+            lines.append(f"{name}{_labels(('cache',), (cache_name,))} {entry[key]}")
+
+    stream_metrics = {
+        "subscribers": ("gauge", "Conexões de streaming abertas"),
+        "tickers": ("gauge", "Tickers distintos buscados por tick"),
+        "ticks": ("counter", "Ticks do poller de cotações"),
+        "fetch_errors": ("counter", "Lotes de cotação com erro no provedor"),
+        "coalesced": ("counter", "Atualizações substituídas por uma mais nova antes do envio"),
+        "slow_disconnects": ("counter", "Conexões derrubadas por envio lento"),
+    }
+    stream = price_hub.stats()
+    for key, (kind, help_text) in stream_metrics.items():
+        name = f"price_stream_{key}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {stream[key]}")
+
+    refresh_metrics = {
+        "runs": ("counter", "Execuções do agendador de preços"),
+        "run_failures": ("counter", "Execuções do agendador interrompidas por erro"),
+        "run_seconds_total": ("counter", "Tempo total das execuções do agendador"),
+        "last_run_seconds": ("gauge", "Duração da última execução"),
+        "last_run_timestamp": ("gauge", "Fim da última execução (epoch)"),
+        "last_run_assets": ("gauge", "Ativos em carteira na última execução"),
+        "provider_calls": ("counter", "Chamadas ao provedor, incluindo novas tentativas"),
+        "provider_errors": ("counter", "Chamadas ao provedor com erro"),
+        "retries": ("counter", "Novas tentativas após erro"),
+        "failed_tickers": ("counter", "Tickers sem preço após esgotar as tentativas"),
+        "rows_written": ("counter", "Barras de preço gravadas"),
+        "rate_limited_seconds": ("counter", "Tempo esperando o token bucket"),
+    }
+    refresh = price_scheduler.stats()
+    for key, (kind, help_text) in refresh_metrics.items():
+        name = f"price_refresh_{key}" + ("_total" if kind == "counter" and not key.endswith("_total") else "")
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {refresh[key]}")
+
+    return "\n".join(lines) + "\n"
+
+install_query_hooks(engine, read_engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -14,6 +14,11 @@ class Asset(Base):
 
 class Allocation(Base):
     __tablename__ = "allocations"
+    __table_args__ = (
+        # Carteira do cliente (por ativo) e posições de um ativo no valuation
+        Index("ix_allocations_client_id_asset_id", "client_id", "asset_id"),
+        Index("ix_allocations_asset_id", "asset_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.database import Base
+
+class CashBalance(Base):
+    __tablename__ = "cash_balances"
+    
+    # Uma linha por (cliente, dia com movimentação): fluxo do dia e saldo acumulado ao fim dele.
+    # O saldo em qualquer data é o da última linha com day <= data (busca na PK)
+    client_id = Column(Integer, ForeignKey("clients.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    net_flow = Column(Float, nullable=False, default=0.0)
+    balance = Column(Float, nullable=False, default=0.0)
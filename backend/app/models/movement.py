@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
@@ -9,9 +9,14 @@ class MovementType(enum.Enum):
 
 class Movement(Base):
     __tablename__ = "movements"
+    __table_args__ = (
+        # Extrato por cliente (ordenado por data) e filtros por período
+        Index("ix_movements_client_id_date", "client_id", "date"),
+        Index("ix_movements_date", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, nullable=False)
+    client_id = Column(Integer, ForeignKey("clients.id", name="fk_movements_client_id"), nullable=False)
     type = Column(Enum(MovementType), nullable=False)
     amount = Column(Float, nullable=False)
     date = Column(DateTime(timezone=True), nullable=False)
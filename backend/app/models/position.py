@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Position(Base):
+    __tablename__ = "positions"
+    
+    # Uma linha por (cliente, ativo), mantida junto com as alocações (lotes de compra)
+    client_id = Column(Integer, ForeignKey("clients.id"), primary_key=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True, index=True)
+    quantity = Column(Float, nullable=False, default=0.0)
+    average_cost = Column(Float, nullable=False, default=0.0)
+    total_invested = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, Date, BigInteger, ForeignKey
+from app.database import Base
+
+class Price(Base):
+    __tablename__ = "prices"
+    
+    # PK composta (asset_id, date): histórico de um ativo sai de um único range scan
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger)
@@ -1,18 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, date
 
-from app.database import get_session 
+from app.database import get_session, get_read_session
 from app.models.asset import Asset, Allocation
 from app.models.client import Client
-from app.schemas.asset import AssetPublic, AllocationCreate, AllocationPublic
-from app.services.yahoo_finance import search_asset
+from app.schemas.price import PriceHistory, PriceRefreshResult
+from app.schemas.asset import (
+    AssetPublic, AssetBatchRequest, AssetBatchItem, AssetBatchResult,
+    AllocationCreate, AllocationPublic
+)
+from app.services.yahoo_finance import search_asset, search_assets
+from app.services.price_history import refresh_prices, get_price_history
+from app.services.positions import apply_allocations
+from app.services.cache import bump_version
+from app.services.http_cache import ResponseCache
+from app.services.serialization import FastJSONResponse, rows_as_dicts
+from app.services.queries import allocation_rows_query
 from app.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/assets", tags=["Assets"])
 
+assets_http_cache = ResponseCache(["assets"], name="assets")
+
 @router.post("/search/{ticker}", response_model=AssetPublic)
 async def search_asset_route(
     ticker: str,
@@ -20,19 +32,73 @@ async def search_asset_route(
     current_user: dict = Depends(get_current_user)
 ):
     try:
-        asset = await search_asset(ticker, session)
+        asset, created = await search_asset(ticker, session)
+        # Ativo que já existia: consulta sem escrita, os caches de ativos continuam válidos
+        if created:
+            bump_version("assets")
         return asset
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/search", response_model=AssetBatchResult)
+async def search_assets_route(
+    batch: AssetBatchRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Resolver uma lista de tickers (ex.: carteira de um novo cliente)"""
+    results = [AssetBatchItem(**item) for item in await search_assets(batch.tickers, session)]
+    if any(item.status == "created" for item in results):
+        bump_version("assets")
+    
+    return AssetBatchResult(
+        results=results,
+        found=sum(1 for item in results if item.status == "found"),
+        created=sum(1 for item in results if item.status == "created"),
+        failed=sum(1 for item in results if item.status == "failed")
+    )
+
 @router.get("/", response_model=List[AssetPublic])
 async def list_assets(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
+    cached = assets_http_cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     stmt = select(Asset).order_by(Asset.ticker)
     result = await session.execute(stmt)
-    return result.scalars().all()
+    return assets_http_cache.respond(request, result.scalars().all(), List[AssetPublic])
+
+@router.post("/prices/refresh", response_model=PriceRefreshResult)
+async def refresh_prices_route(
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Atualizar o histórico local de preços de todos os ativos"""
+    result = await refresh_prices(session)
+    bump_version("prices")
+    return result
+
+@router.get("/{asset_id}/prices", response_model=PriceHistory)
+async def get_asset_prices(
+    asset_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    asset_stmt = select(Asset).where(Asset.id == asset_id)
+    asset_result = await session.execute(asset_stmt)
+    asset = asset_result.scalars().first()
+    
+    if not asset:
+        raise HTTPException(status_code=404, detail="Ativo não encontrado")
+    
+    prices = await get_price_history(session, asset_id, start_date, end_date)
+    return PriceHistory(asset_id=asset.id, ticker=asset.ticker, prices=prices)
 
 @router.post("/allocations", response_model=AllocationPublic)
 async def create_allocation(
@@ -59,7 +125,10 @@ async def create_allocation(
     # Criar alocação
     new_allocation = Allocation(**allocation_data.dict())
     session.add(new_allocation)
+    # Posição consolidada atualizada na mesma transação
+    await apply_allocations(session, [allocation_data.dict()])
     await session.commit()
+    bump_version("allocations")
     await session.refresh(new_allocation)
     
     # Retornar com dados relacionados
@@ -71,71 +140,47 @@ async def create_allocation(
         total_invested=new_allocation.quantity * new_allocation.buy_price
     )
 
+def _paginate_allocations(query, after_id: Optional[int], limit: Optional[int]):
+    # Paginação por chave (keyset): custo constante independente da página
+    if after_id is not None:
+        query = query.where(Allocation.id > after_id)
+    query = query.order_by(Allocation.id)
+    # Sem limit a lista vem inteira, como antes da paginação (página de alocações e exportação)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
 @router.get("/clients/{client_id}/allocations", response_model=List[AllocationPublic])
 async def get_client_allocations(
     client_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    asset_id: Optional[int] = Query(None),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: dict = Depends(get_current_user)
 ):
     # Verificar se cliente existe
-    client_stmt = select(Client).where(Client.id == client_id)
+    client_stmt = select(Client.id).where(Client.id == client_id)
     client_result = await session.execute(client_stmt)
-    client = client_result.scalars().first()
     
-    if not client:
+    if client_result.scalar() is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
-    # Buscar alocações do cliente
-    stmt = select(Allocation).where(Allocation.client_id == client_id)
-    result = await session.execute(stmt)
-    allocations = result.scalars().all()
-    
-    # Buscar dados dos assets e calcular totais
-    allocation_list = []
-    for allocation in allocations:
-        asset_stmt = select(Asset).where(Asset.id == allocation.asset_id)
-        asset_result = await session.execute(asset_stmt)
-        asset = asset_result.scalars().first()
-        
-        allocation_list.append(AllocationPublic(
-            **allocation.__dict__,
-            asset_ticker=asset.ticker,
-            asset_name=asset.name,
-            client_name=client.name,
-            total_invested=allocation.quantity * allocation.buy_price
-        ))
-    
-    return allocation_list
+    # Buscar alocações do cliente com ativo e totais em uma única query
+    query = allocation_rows_query(client_id=client_id, asset_id=asset_id)
+    result = await session.execute(_paginate_allocations(query, after_id, limit))
+    return FastJSONResponse(rows_as_dicts(result))
 
 @router.get("/allocations", response_model=List[AllocationPublic])
 async def get_all_allocations(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    client_id: Optional[int] = Query(None),
+    asset_id: Optional[int] = Query(None),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: dict = Depends(get_current_user)
 ):
-    # Buscar todas as alocações
-    stmt = select(Allocation)
-    result = await session.execute(stmt)
-    allocations = result.scalars().all()
-    
-    # Buscar dados relacionados
-    allocation_list = []
-    for allocation in allocations:
-        # Buscar asset
-        asset_stmt = select(Asset).where(Asset.id == allocation.asset_id)
-        asset_result = await session.execute(asset_stmt)
-        asset = asset_result.scalars().first()
-        
-        # Buscar cliente
-        client_stmt = select(Client).where(Client.id == allocation.client_id)
-        client_result = await session.execute(client_stmt)
-        client = client_result.scalars().first()
-        
-        allocation_list.append(AllocationPublic(
-            **allocation.__dict__,
-            asset_ticker=asset.ticker,
-            asset_name=asset.name,
-            client_name=client.name,
-            total_invested=allocation.quantity * allocation.buy_price
-        ))
-    
-    return allocation_list
\ No newline at end of file
+    # Buscar alocações com ativo e cliente em uma única query
+    query = allocation_rows_query(client_id=client_id, asset_id=asset_id)
+    result = await session.execute(_paginate_allocations(query, after_id, limit))
+    return FastJSONResponse(rows_as_dicts(result))
@@ -1,29 +1,27 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import jwt
 from datetime import timedelta, datetime
-import bcrypt
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.database import get_session
+from app.models.user import User
+from app.auth.security import verify_password_async
 
 router = APIRouter(tags=["auth"])
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = "junior-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Usuários do sistema - SIMPLES E DIRETO
-fake_users_db = {
-    "admin": {
-        "username": "admin",
-        "full_name": "Administrator",
-        "email": "admin@invest.com",
-        "password": "admin123",  # ✅ Senha em texto plano para desenvolvimento
-        "disabled": False,
-    }
-}
-
-def verify_password(plain_password: str, stored_password: str) -> bool:
-    """Verifica se a senha está correta"""
-    return plain_password == stored_password
+# Hash bcrypt (mesmo custo dos reais) de uma senha aleatória descartada: usuário inexistente
+# também paga um bcrypt, e o tempo de resposta não revela quais usernames existem
+_DUMMY_PASSWORD_HASH = "$2b$12$pqLMTyXa2OWcJW0kU12Onuo1Lwcr6sqdzJvkYJH19GSnStzjUUhrG"
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -35,38 +33,44 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(username: str, password: str):
-    print(f"🔐 Tentando autenticar usuário: {username}")
-    user = fake_users_db.get(username)
-    if not user:
-        print(f"❌ Usuário {username} não encontrado")
-        return False
-    
-    print(f"✅ Usuário encontrado: {user['username']}")
-    print(f"🔑 Verificando senha...")
-    print(f"Senha fornecida: '{password}'")
-    print(f"Senha esperada: '{user['password']}'")
+async def get_user(session: AsyncSession, username: str) -> Optional[dict]:
+    """Busca o usuário por username ou e-mail
+
+    Sem cache: a linha traz o hash da senha e o is_active, que precisam refletir o banco
+    a cada login (senha trocada ou usuário desativado valem na hora).
+    """
+    stmt = select(User).where(or_(User.username == username, User.email == username))
+    result = await session.execute(stmt)
+    db_user = result.scalars().first()
+    if db_user is None:
+        return None
     
-    # Verificar senha
-    password_ok = verify_password(password, user["password"])
-    print(f"Senha correta: {password_ok}")
+    return {
+        "username": db_user.username or db_user.email,
+        "full_name": db_user.full_name or db_user.username or db_user.email,
+        "email": db_user.email,
+        "password": db_user.password,
+        "disabled": not db_user.is_active,
+    }
+
+async def authenticate_user(session: AsyncSession, username: str, password: str):
+    user = await get_user(session, username)
     
-    if not password_ok:
-        print(f"❌ Senha incorreta para {username}")
+    # Verificar senha (bcrypt fora do event loop), inclusive quando o usuário não existe
+    password_ok = await verify_password_async(password, user["password"] if user else _DUMMY_PASSWORD_HASH)
+    if not user or user["disabled"] or not password_ok:
+        logger.debug("Login recusado")
         return False
     
-    print(f"✅ Login bem-sucedido para {username}")
     return user
 
 @router.post("/token")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    print(f"\n🚀 Recebendo requisição de login")
-    print(f"Username: {form_data.username}")
-    print(f"Password length: {len(form_data.password)}")
-    
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    session: AsyncSession = Depends(get_session)
+):
+    user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
-        print("❌ Autenticação falhou")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -78,11 +82,9 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         data={"sub": user["username"]}, expires_delta=access_token_expires
     )
     
-    print(f"✅ Token gerado com sucesso para {user['username']}")
-    
     return {
         "access_token": access_token,
         "token_type": "bearer",
         "username": user["username"],
         "full_name": user["full_name"]
-    }
\ No newline at end of file
+    }
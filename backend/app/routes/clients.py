@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from typing import List, Literal, Optional
 from math import ceil
 
-from app.database import get_session 
+from app.database import get_session
 from app.models.client import Client
 from app.schemas.client import ClientCreate, ClientPublic, ClientList
+from app.services.cache import bump_version
+from app.services.queries import client_filters
+from app.services.client_search import apply_client_search
+from app.services.counts import count_rows
+from app.services.http_cache import ResponseCache
 from app.auth.dependencies import get_current_user
 
 from pydantic import BaseModel, EmailStr
@@ -33,49 +39,91 @@ class ClientList(BaseModel):
     total: int
     page: int
     pages: int
+    next_after_id: Optional[int] = None
+    prev_before_id: Optional[int] = None
+    total_is_estimate: bool = False
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
+# Listagem e detalhe servidos do cache até a próxima escrita em clients
+clients_http_cache = ResponseCache(["clients"], name="clients")
+
 @router.get("/", response_model=ClientList)
 async def list_clients(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    after_id: Optional[int] = Query(None, ge=0),
+    before_id: Optional[int] = Query(None, ge=1),
     search: Optional[str] = Query(None),
+    search_mode: Literal["contains", "prefix"] = Query("contains"),
     is_active: Optional[bool] = Query(None),
+    count: Literal["exact", "cached", "estimated"] = Query("exact"),
     current_user: dict = Depends(get_current_user)
 ):
+    cached = clients_http_cache.lookup(request)
+    if cached is not None:
+        return cached
+    
+    # Com after_id/before_id a paginação é por chave e a ordem é sempre por id
+    keyset = after_id is not None or before_id is not None
+    
     # Query base
     query = select(Client)
     count_query = select(func.count(Client.id))
     
     # Aplicar filtros
-    if search:
-        search_filter = Client.name.ilike(f"%{search}%") | Client.email.ilike(f"%{search}%")
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+    filters = client_filters(is_active)
+    if filters:
+        query = query.where(*filters)
+        count_query = count_query.where(*filters)
     
-    if is_active is not None:
-        query = query.where(Client.is_active == is_active)
-        count_query = count_query.where(Client.is_active == is_active)
+    # Busca indexada; resultados ordenados por relevância
+    if search:
+        prefix = search_mode == "prefix"
+        query = await apply_client_search(session, query, search, prefix=prefix, ranked=not keyset)
+        count_query = await apply_client_search(session, count_query, search, prefix=prefix, ranked=False)
     
-    # Calcular paginação
-    total_result = await session.execute(count_query)
-    total = total_result.scalar()
+    # Calcular total
+    total, total_is_estimate = await count_rows(
+        session,
+        count_query,
+        "clients",
+        mode=count,
+        cache_key=(search, search_mode, is_active),
+        filtered=bool(filters or search)
+    )
     pages = ceil(total / limit) if total > 0 else 1
-    offset = (page - 1) * limit
     
     # Executar query com paginação
-    query = query.order_by(Client.id).offset(offset).limit(limit)
+    if after_id is not None:
+        query = query.where(Client.id > after_id).order_by(Client.id).limit(limit)
+    elif before_id is not None:
+        query = query.where(Client.id < before_id).order_by(Client.id.desc()).limit(limit)
+    else:
+        offset = (page - 1) * limit
+        query = query.order_by(Client.id).offset(offset).limit(limit)
     result = await session.execute(query)
     clients = result.scalars().all()
+    if before_id is not None:
+        clients = clients[::-1]
+    
+    next_after_id = None
+    prev_before_id = None
+    if keyset and clients:
+        next_after_id = clients[-1].id if len(clients) == limit or before_id is not None else None
+        prev_before_id = clients[0].id if after_id is not None or len(clients) == limit else None
     
-    return ClientList(
+    return clients_http_cache.respond(request, ClientList(
         clients=clients,
         total=total,
         page=page,
-        pages=pages
-    )
+        pages=pages,
+        next_after_id=next_after_id,
+        prev_before_id=prev_before_id,
+        total_is_estimate=total_is_estimate
+    ), ClientList)
 
 @router.post("/", response_model=ClientPublic, status_code=201)
 async def create_client(
@@ -96,15 +144,21 @@ async def create_client(
     )
     session.add(new_client)
     await session.commit()
+    bump_version("clients")
     await session.refresh(new_client)
     return new_client
 
 @router.get("/{client_id}", response_model=ClientPublic)
 async def get_client(
     client_id: int,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
+    cached = clients_http_cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     stmt = select(Client).where(Client.id == client_id)
     result = await session.execute(stmt)
     client = result.scalars().first()
@@ -112,7 +166,7 @@ async def get_client(
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
-    return client
+    return clients_http_cache.respond(request, client, ClientPublic)
 
 @router.put("/{client_id}", response_model=ClientPublic)
 async def update_client(
@@ -140,6 +194,7 @@ async def update_client(
     client.is_active = client_data.is_active
     
     await session.commit()
+    bump_version("clients")
     await session.refresh(client)
     return client
 
@@ -157,7 +212,16 @@ async def delete_client(
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
     await session.delete(client)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Alocações e movimentações referenciam o cliente (FKs): o histórico não é apagado
+        await session.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Cliente possui alocações ou movimentações. Inative-o em vez de excluir."
+        )
+    bump_version("clients")
     
     return {"message": "Cliente deletado com sucesso"}
 
@@ -177,6 +241,7 @@ async def activate_client(
     
     client.is_active = True
     await session.commit()
+    bump_version("clients")
     await session.refresh(client)
     
     return client
@@ -197,6 +262,7 @@ async def inactivate_client(
     
     client.is_active = False
     await session.commit()
+    bump_version("clients")
     await session.refresh(client)
     
     return client
\ No newline at end of file
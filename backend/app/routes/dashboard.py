@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app.database import get_session
+from app.models.asset import Asset, Allocation
+from app.models.client import Client
+from app.models.movement import Movement
+from app.schemas.dashboard import DashboardSummary, TopAsset, RecentMovement
+from app.services.cache import VersionedCache
+from app.services.movement_summary import summarize_movements
+from app.auth.dependencies import get_current_user
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+# Indicadores recalculados só quando alguma rota de escrita altera estas tabelas
+summary_cache = VersionedCache(["clients", "assets", "allocations", "movements"], maxsize=32, name="dashboard_summary")
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    session: AsyncSession = Depends(get_session),
+    top: int = Query(5, ge=1, le=50),
+    recent: int = Query(10, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    cache_key = (top, recent)
+    cached, versions = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Clientes ativos/inativos
+    status_stmt = select(Client.is_active, func.count(Client.id)).group_by(Client.is_active)
+    status_result = await session.execute(status_stmt)
+    counts = {bool(is_active): count for is_active, count in status_result.all()}
+    
+    # Exposição por ativo; o total geral sai da mesma agregação
+    invested = func.sum(Allocation.quantity * Allocation.buy_price)
+    exposure_stmt = (
+        select(Asset.id, Asset.ticker, Asset.name, invested.label("total_invested"))
+        .join(Allocation, Allocation.asset_id == Asset.id)
+        .group_by(Asset.id, Asset.ticker, Asset.name)
+        .order_by(invested.desc())
+    )
+    exposure_result = await session.execute(exposure_stmt)
+    exposures = exposure_result.all()
+    total_invested = sum(row.total_invested for row in exposures)
+    
+    top_assets = [
+        TopAsset(
+            asset_id=row.id,
+            ticker=row.ticker,
+            name=row.name,
+            total_invested=row.total_invested,
+            weight=row.total_invested / total_invested if total_invested else 0.0
+        )
+        for row in exposures[:top]
+    ]
+    
+    # Fluxo líquido
+    flows = await summarize_movements(session, breakdown=False)
+    
+    # Atividade recente
+    recent_stmt = (
+        select(
+            Movement.id,
+            Movement.client_id,
+            Client.name.label("client_name"),
+            Movement.type,
+            Movement.amount,
+            Movement.date,
+        )
+        .join(Client, Client.id == Movement.client_id)
+        .order_by(Movement.date.desc(), Movement.id.desc())
+        .limit(recent)
+    )
+    recent_result = await session.execute(recent_stmt)
+    recent_activity = [
+        RecentMovement(**{**row, "type": row["type"].value})
+        for row in recent_result.mappings()
+    ]
+    
+    summary = DashboardSummary(
+        active_clients=counts.get(True, 0),
+        inactive_clients=counts.get(False, 0),
+        total_invested=total_invested,
+        total_deposits=flows["total_deposits"],
+        total_withdrawals=flows["total_withdrawals"],
+        net_flow=flows["net_flow"],
+        top_assets=top_assets,
+        recent_activity=recent_activity
+    )
+    summary_cache.set(cache_key, summary, versions)
+    return summary
@@ -0,0 +1,105 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session
+from app.models.client import Client
+from app.models.asset import Allocation
+from app.models.movement import Movement, MovementType
+from app.services.client_search import apply_client_search
+from app.services.queries import client_filters, allocation_rows_query, movement_rows_query
+from app.auth.dependencies import get_current_user
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+# Linhas lidas do cursor no servidor e escritas por bloco
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+def _export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _stream_export(session: AsyncSession, query, format: str, filename: str) -> StreamingResponse:
+    """Lê o resultado por um cursor no servidor e envia CSV/NDJSON em blocos"""
+    async def generate():
+        if format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(column.key for column in query.selected_columns)
+            yield buffer.getvalue()
+        
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.mappings().partitions(EXPORT_BATCH_SIZE):
+            buffer = io.StringIO()
+            if format == "csv":
+                writer = csv.writer(buffer)
+                writer.writerows([_export_value(value) for value in row.values()] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps({key: _export_value(value) for key, value in row.items()}))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+    
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+@router.get("/clients")
+async def export_clients(
+    session: AsyncSession = Depends(get_read_session),
+    format: ExportFormat = Query("csv"),
+    search: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    query = select(Client.id, Client.name, Client.email, Client.is_active, Client.created_at)
+    filters = client_filters(is_active)
+    if filters:
+        query = query.where(*filters)
+    if search:
+        query = await apply_client_search(session, query, search, ranked=False)
+    return _stream_export(session, query.order_by(Client.id), format, "clientes")
+
+@router.get("/allocations")
+async def export_allocations(
+    session: AsyncSession = Depends(get_read_session),
+    format: ExportFormat = Query("csv"),
+    client_id: Optional[int] = Query(None),
+    asset_id: Optional[int] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    query = allocation_rows_query(client_id=client_id, asset_id=asset_id).order_by(Allocation.id)
+    return _stream_export(session, query, format, "alocacoes")
+
+@router.get("/movements")
+async def export_movements(
+    session: AsyncSession = Depends(get_read_session),
+    format: ExportFormat = Query("csv"),
+    client_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    type: Optional[MovementType] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    query = movement_rows_query(client_id, start_date, end_date, type)
+    query = query.order_by(Movement.date.desc(), Movement.id.desc())
+    return _stream_export(session, query, format, "movimentacoes")
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session
+from app.schemas.imports import ImportResult
+from app.services.bulk_import import import_movements, import_allocations
+from app.services.cache import bump_version
+from app.auth.dependencies import get_current_user
+
+router = APIRouter(prefix="/imports", tags=["Imports"])
+
+def _check_csv(file: UploadFile):
+    if file.filename and not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Envie um arquivo .csv")
+
+@router.post("/movements", response_model=ImportResult)
+async def import_movements_route(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Importar movimentações (colunas: client_id, type, amount, date, note)"""
+    _check_csv(file)
+    result = await import_movements(session, file.file)
+    if result["imported"]:
+        bump_version("movements")
+    return result
+
+@router.post("/allocations", response_model=ImportResult)
+async def import_allocations_route(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Importar alocações (colunas: client_id, asset_id ou ticker, quantity, buy_price, buy_date)"""
+    _check_csv(file)
+    result = await import_allocations(session, file.file)
+    if result["imported"]:
+        bump_version("allocations")
+    return result
@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, or_
+import base64
 from datetime import datetime, date
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from app.database import get_session 
+from app.database import get_session, get_read_session
 from app.models.movement import Movement, MovementType
 from app.models.client import Client
-from app.schemas.movement import MovementCreate, MovementPublic, MovementSummary
+from app.schemas.movement import MovementCreate, MovementPublic, MovementPage, MovementSummary, CashBalancePublic
+from app.services.movement_summary import summarize_movements
+from app.services.cash_balances import apply_movements, balance_at, balances_at_query
+from app.services.cache import bump_version
+from app.services.http_cache import ResponseCache
+from app.services.serialization import FastJSONResponse, rows_as_dicts
+from app.services.queries import movement_rows_query
 from app.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/movements", tags=["Movements"])
 
+# O resumo traz o nome do cliente: muda com movements e com clients
+summary_http_cache = ResponseCache(["movements", "clients"], name="movement_summary")
+
 @router.post("/", response_model=MovementPublic)
 async def create_movement(
     movement_data: MovementCreate,
@@ -26,9 +36,13 @@ async def create_movement(
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
-    new_movement = Movement(**movement_data.dict())
+    values = {**movement_data.dict(), "type": MovementType(movement_data.type.value)}
+    new_movement = Movement(**values)
     session.add(new_movement)
+    # Saldo em caixa atualizado na mesma transação da movimentação
+    await apply_movements(session, [values])
     await session.commit()
+    bump_version("movements")
     await session.refresh(new_movement)
     
     return MovementPublic(
@@ -36,100 +50,112 @@ async def create_movement(
         client_name=client.name
     )
 
-@router.get("/", response_model=List[MovementPublic])
+def _encode_cursor(movement_date: datetime, movement_id: int) -> str:
+    raw = f"{movement_date.isoformat()}|{movement_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        movement_date, movement_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(movement_date), int(movement_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+@router.get("/", response_model=MovementPage)
 async def get_movements(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     client_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     type: Optional[MovementType] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     current_user: dict = Depends(get_current_user)
 ):
-    query = select(Movement)
-    
-    if client_id:
-        query = query.where(Movement.client_id == client_id)
-    
-    if start_date:
-        query = query.where(Movement.date >= start_date)
-    
-    if end_date:
-        query = query.where(Movement.date <= end_date)
-    
-    if type:
-        query = query.where(Movement.type == type)
-    
-    query = query.order_by(Movement.date.desc())
+    query = movement_rows_query(client_id, start_date, end_date, type)
+    
+    # Paginação por cursor em (date, id): continua logo após a última linha da página anterior
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Movement.date < cursor_date,
+                and_(Movement.date == cursor_date, Movement.id < cursor_id),
+            )
+        )
+    
+    query = query.order_by(Movement.date.desc(), Movement.id.desc())
+    # Sem limit a lista vem inteira, como antes da paginação (telas de movimentações e exportação)
+    if limit is not None:
+        # Uma linha extra indica se existe próxima página
+        query = query.limit(limit + 1)
     result = await session.execute(query)
-    movements = result.scalars().all()
+    rows = rows_as_dicts(result)
     
-    # Buscar nomes dos clientes
-    movement_list = []
-    for movement in movements:
-        client_stmt = select(Client).where(Client.id == movement.client_id)
-        client_result = await session.execute(client_stmt)
-        client = client_result.scalars().first()
-        
-        movement_list.append(MovementPublic(
-            **movement.__dict__,
-            client_name=client.name
-        ))
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]["date"], rows[-1]["id"])
     
-    return movement_list
+    # Linhas do SQL direto para o orjson; o enum do modelo sai pelo valor ("deposit"/"withdrawal")
+    return FastJSONResponse({"movements": rows, "next_cursor": next_cursor})
 
 @router.get("/summary", response_model=MovementSummary)
 async def get_movements_summary(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     client_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    group_by: Optional[Literal["month", "week"]] = Query(None),
     current_user: dict = Depends(get_current_user)
 ):
-    # Query base
-    query = select(Movement)
-    
-    if client_id:
-        query = query.where(Movement.client_id == client_id)
-    
-    if start_date:
-        query = query.where(Movement.date >= start_date)
-    
-    if end_date:
-        query = query.where(Movement.date <= end_date)
-    
+    cached = summary_http_cache.lookup(request)
+    if cached is not None:
+        return cached
+    
+    # Resumo por cliente só na visão geral ou quando agrupado por período
+    summary = await summarize_movements(
+        session,
+        client_id=client_id,
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        breakdown=not client_id or group_by is not None,
+    )
+    return summary_http_cache.respond(request, MovementSummary(**summary), MovementSummary)
+
+@router.get("/balances", response_model=List[CashBalancePublic])
+async def get_cash_balances(
+    session: AsyncSession = Depends(get_read_session),
+    at: Optional[date] = Query(None),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Saldo em caixa de todos os clientes ao fim de `at` (ex.: último dia do mês), paginado por id"""
+    at = at or date.today()
+    query = balances_at_query(at, after_id=after_id).limit(limit)
     result = await session.execute(query)
-    movements = result.scalars().all()
-    
-    # Calcular totais
-    total_deposits = sum(m.amount for m in movements if m.type == MovementType.DEPOSIT)
-    total_withdrawals = sum(m.amount for m in movements if m.type == MovementType.WITHDRAWAL)
-    net_flow = total_deposits - total_withdrawals
-    
-    # Resumo por cliente
-    client_summary = []
-    if not client_id:
-        # Buscar todos os movimentos agrupados por cliente
-        client_stmt = select(Client)
-        client_result = await session.execute(client_stmt)
-        clients = client_result.scalars().all()
-        
-        for client in clients:
-            client_movements = [m for m in movements if m.client_id == client.id]
-            client_deposits = sum(m.amount for m in client_movements if m.type == MovementType.DEPOSIT)
-            client_withdrawals = sum(m.amount for m in client_movements if m.type == MovementType.WITHDRAWAL)
-            client_net_flow = client_deposits - client_withdrawals
-            
-            client_summary.append({
-                "client_id": client.id,
-                "client_name": client.name,
-                "total_deposits": client_deposits,
-                "total_withdrawals": client_withdrawals,
-                "net_flow": client_net_flow
-            })
-    
-    return MovementSummary(
-        total_deposits=total_deposits,
-        total_withdrawals=total_withdrawals,
-        net_flow=net_flow,
-        client_summary=client_summary
-    )
\ No newline at end of file
+    rows = rows_as_dicts(result)
+    for row in rows:
+        row["at"] = at
+    return FastJSONResponse(rows)
+
+@router.get("/balance/{client_id}", response_model=CashBalancePublic)
+async def get_cash_balance(
+    client_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    at: Optional[date] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    at = at or date.today()
+    snapshot = await balance_at(session, client_id, at)
+    if snapshot is None:
+        client = await session.get(Client, client_id)
+        if not client:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return CashBalancePublic(client_id=client_id, at=at, balance=0.0)
+    
+    return CashBalancePublic(client_id=client_id, at=at, as_of=snapshot.day, balance=snapshot.balance)
@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+
+from app.database import get_session, get_read_session
+from app.models.client import Client
+from app.models.position import Position
+from app.schemas.portfolio import PortfolioValuation, ClientValuation, ClientReturns, PositionPublic
+from app.services.valuation import value_portfolios
+from app.services.positions import positions_query
+from app.services.serialization import FastJSONResponse, rows_as_dicts
+from app.services.returns import client_returns
+from app.auth.dependencies import get_current_user
+
+router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
+
+@router.get("/valuation", response_model=PortfolioValuation)
+async def get_portfolio_valuation(
+    session: AsyncSession = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Valor de mercado e P&L de todas as carteiras do escritório"""
+    valuation = await value_portfolios(session)
+    clients = valuation["clients"]
+    assets = valuation["assets"]
+    names = valuation["client_names"]
+    tickers = valuation["tickers"]
+    
+    return PortfolioValuation(
+        as_of=valuation["as_of"],
+        cost=valuation["cost"],
+        market_value=valuation["market_value"],
+        unrealized_pnl=valuation["market_value"] - valuation["cost"],
+        clients=[
+            ClientValuation(
+                client_id=client_id,
+                client_name=names.get(client_id),
+                cost=cost,
+                market_value=market_value,
+                unrealized_pnl=pnl
+            )
+            for client_id, cost, market_value, pnl in zip(
+                clients["client_id"].tolist(),
+                clients["cost"].tolist(),
+                clients["market_value"].tolist(),
+                clients["unrealized_pnl"].tolist(),
+            )
+        ],
+        assets=[
+            {
+                "asset_id": asset_id,
+                "ticker": tickers.get(asset_id, ""),
+                "quantity": quantity,
+                "market_value": market_value,
+                "weight": weight,
+            }
+            for asset_id, quantity, market_value, weight in zip(
+                assets["asset_id"].tolist(),
+                assets["quantity"].tolist(),
+                assets["market_value"].tolist(),
+                assets["weight"].tolist(),
+            )
+        ]
+    )
+
+@router.get("/valuation/{client_id}", response_model=ClientValuation)
+async def get_client_valuation(
+    client_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user)
+):
+    valuation = await value_portfolios(session, client_id=client_id)
+    if client_id not in valuation["client_names"]:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    
+    positions = valuation["positions"]
+    tickers = valuation["tickers"]
+    columns = [name for name in positions if name != "client_id"]
+    holdings = [
+        {**dict(zip(columns, values)), "ticker": tickers.get(values[0], "")}
+        for values in zip(*(positions[name].tolist() for name in columns))
+    ]
+    
+    return ClientValuation(
+        client_id=client_id,
+        client_name=valuation["client_names"][client_id],
+        cost=valuation["cost"],
+        market_value=valuation["market_value"],
+        unrealized_pnl=valuation["market_value"] - valuation["cost"],
+        holdings=holdings
+    )
+
+@router.get("/positions/{client_id}", response_model=List[PositionPublic])
+async def get_client_positions(
+    client_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Posição consolidada por ativo: uma linha por ativo, independente do número de lotes"""
+    client_result = await session.execute(select(Client.id).where(Client.id == client_id))
+    if client_result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    
+    result = await session.execute(positions_query(client_id=client_id).order_by(Position.asset_id))
+    return FastJSONResponse(rows_as_dicts(result))
+
+@router.get("/returns", response_model=List[ClientReturns])
+async def get_portfolio_returns(
+    session: AsyncSession = Depends(get_session),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """TWR e XIRR de todos os clientes na janela (desde o início se start_date for omitido)"""
+    return await client_returns(session, start_date, end_date)
+
+@router.get("/returns/{client_id}", response_model=ClientReturns)
+async def get_client_returns(
+    client_id: int,
+    session: AsyncSession = Depends(get_session),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    returns = await client_returns(session, start_date, end_date, client_id=client_id)
+    if not returns:
+        raise HTTPException(status_code=404, detail="Cliente sem movimentações ou alocações")
+    return returns[0]
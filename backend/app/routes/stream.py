@@ -0,0 +1,65 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from app.schemas.stream import StreamSubscription
+from app.services.price_stream import PRICE_STREAM_SEND_TIMEOUT, Subscriber, price_hub
+from app.services.serialization import dumps
+from app.auth.dependencies import get_websocket_user
+
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+async def _send_updates(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        updates = await subscriber.next_batch()
+        try:
+            await asyncio.wait_for(
+                websocket.send_text(dumps({"type": "updates", "updates": updates}).decode()),
+                timeout=PRICE_STREAM_SEND_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            # Consumidor lento demais mesmo com as atualizações coalescidas: desconecta
+            price_hub.disconnects += 1
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+
+async def _receive_subscriptions(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        try:
+            message = StreamSubscription.model_validate_json(await websocket.receive_text())
+        except ValidationError as e:
+            await websocket.send_text(dumps({"type": "error", "detail": e.errors(include_url=False, include_context=False)}).decode())
+            continue
+
+        if message.action == "unsubscribe":
+            price_hub.unsubscribe(subscriber, message.tickers, message.clients)
+            continue
+        try:
+            await price_hub.subscribe(subscriber, message.tickers, message.clients)
+        except ValueError as e:
+            await websocket.send_text(dumps({"type": "error", "detail": str(e)}).decode())
+
+@router.websocket("/prices")
+async def stream_prices(websocket: WebSocket, current_user: dict = Depends(get_websocket_user)):
+    """Cotações e valor de carteiras ao vivo
+
+    O cliente envia {"action": "subscribe" | "unsubscribe", "tickers": [...], "clients": [...]}
+    e recebe {"type": "updates", "updates": [...]} com mensagens "quote" e "portfolio".
+    """
+    await websocket.accept()
+    subscriber = Subscriber()
+    price_hub.register(subscriber)
+    tasks = [
+        asyncio.create_task(_send_updates(websocket, subscriber)),
+        asyncio.create_task(_receive_subscriptions(websocket, subscriber)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None and not isinstance(task.exception(), WebSocketDisconnect):
+                raise task.exception()
+    finally:
+        price_hub.unregister(subscriber)
+        for task in tasks:
+            task.cancel()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class AssetBase(BaseModel):
     ticker: str
@@ -18,6 +18,21 @@ class AssetPublic(AssetBase):
     class Config:
         from_attributes = True
 
+class AssetBatchRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=1000)
+
+class AssetBatchItem(BaseModel):
+    ticker: str
+    status: Literal["found", "created", "failed"]
+    asset: Optional[AssetPublic] = None
+    error: Optional[str] = None
+
+class AssetBatchResult(BaseModel):
+    results: List[AssetBatchItem]
+    found: int
+    created: int
+    failed: int
+
 class AllocationBase(BaseModel):
     client_id: int
     asset_id: int
@@ -21,4 +21,7 @@ class ClientList(BaseModel):
     clients: list[ClientPublic]
     total: int
     page: int
-    pages: int
\ No newline at end of file
+    pages: int
+    next_after_id: Optional[int] = None
+    prev_before_id: Optional[int] = None
+    total_is_estimate: bool = False
\ No newline at end of file
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+from app.schemas.movement import MovementType
+
+class TopAsset(BaseModel):
+    asset_id: int
+    ticker: str
+    name: str
+    total_invested: float
+    weight: float
+
+class RecentMovement(BaseModel):
+    id: int
+    client_id: int
+    client_name: str
+    type: MovementType
+    amount: float
+    date: datetime
+
+    class Config:
+        from_attributes = True
+
+class DashboardSummary(BaseModel):
+    active_clients: int
+    inactive_clients: int
+    total_invested: float
+    total_deposits: float
+    total_withdrawals: float
+    net_flow: float
+    top_assets: List[TopAsset]
+    recent_activity: List[RecentMovement]
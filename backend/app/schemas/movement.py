@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, field_validator
+from datetime import date, datetime
 from typing import Optional, List
 from enum import Enum
 
@@ -14,6 +14,12 @@ class MovementBase(BaseModel):
     date: datetime
     note: Optional[str] = None
 
+    @field_validator("type", mode="before")
+    @classmethod
+    def unwrap_model_enum(cls, value):
+        # Aceita também o enum do modelo SQLAlchemy (app.models.movement.MovementType)
+        return getattr(value, "value", value)
+
 class MovementCreate(MovementBase):
     pass
 
@@ -25,8 +31,19 @@ class MovementPublic(MovementBase):
     class Config:
         from_attributes = True
 
+class MovementPage(BaseModel):
+    movements: List[MovementPublic]
+    next_cursor: Optional[str] = None
+
 class MovementSummary(BaseModel):
     total_deposits: float
     total_withdrawals: float
     net_flow: float
-    client_summary: List[dict]
\ No newline at end of file
+    client_summary: List[dict]
+class CashBalancePublic(BaseModel):
+    client_id: int
+    client_name: Optional[str] = None
+    at: date
+    # Dia da última movimentação até `at` (None: cliente sem movimentações até a data)
+    as_of: Optional[date] = None
+    balance: float
@@ -0,0 +1,58 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Optional, List
+
+class PositionPublic(BaseModel):
+    client_id: int
+    asset_id: int
+    asset_ticker: str
+    asset_name: str
+    quantity: float
+    average_cost: float
+    total_invested: float
+    updated_at: Optional[datetime] = None
+
+class HoldingValuation(BaseModel):
+    asset_id: int
+    ticker: str
+    quantity: float
+    average_cost: float
+    price: float
+    priced: bool
+    cost: float
+    market_value: float
+    unrealized_pnl: float
+    weight: float
+
+class ClientValuation(BaseModel):
+    client_id: int
+    client_name: Optional[str] = None
+    cost: float
+    market_value: float
+    unrealized_pnl: float
+    holdings: List[HoldingValuation] = []
+
+class AssetExposure(BaseModel):
+    asset_id: int
+    ticker: str
+    quantity: float
+    market_value: float
+    weight: float
+
+class PortfolioValuation(BaseModel):
+    as_of: Optional[date] = None
+    cost: float
+    market_value: float
+    unrealized_pnl: float
+    clients: List[ClientValuation]
+    assets: List[AssetExposure]
+
+class ClientReturns(BaseModel):
+    client_id: int
+    start_date: Optional[date] = None
+    end_date: date
+    start_value: float
+    end_value: float
+    net_flow: float
+    twr: Optional[float] = None
+    xirr: Optional[float] = None
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional, List
+
+class PricePublic(BaseModel):
+    date: date
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: float
+    volume: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+class PriceHistory(BaseModel):
+    asset_id: int
+    ticker: str
+    prices: List[PricePublic]
+
+class PriceRefreshResult(BaseModel):
+    assets: int
+    provider_calls: int
+    inserted: int
+    failed: List[str]
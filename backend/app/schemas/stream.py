@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import List, Literal
+
+class StreamSubscription(BaseModel):
+    """Mensagem do cliente no WebSocket de cotações"""
+    action: Literal["subscribe", "unsubscribe"]
+    tickers: List[str] = []
+    clients: List[int] = []
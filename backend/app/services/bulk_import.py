@@ -0,0 +1,171 @@
+import asyncio
+import codecs
+import csv
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.asset import Asset, Allocation
+from app.models.client import Client
+from app.models.movement import Movement, MovementType as ModelMovementType
+from app.schemas.asset import AllocationCreate
+from app.schemas.movement import MovementCreate
+from app.services.positions import apply_allocations
+from app.services.cash_balances import apply_imported_movements
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+MOVEMENT_COLUMNS = ["client_id", "type", "amount", "date", "note"]
+ALLOCATION_COLUMNS = ["client_id", "asset_id", "quantity", "buy_price", "buy_date"]
+
+def _read_csv_batches(file: BinaryIO, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[List[Tuple[int, dict]]]:
+    """Lê o CSV enviado em lotes de (número da linha, valores), sem carregar o arquivo inteiro"""
+    reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+    batch = []
+    for row in reader:
+        values = {key.strip(): (value.strip() or None) for key, value in row.items() if key and value is not None}
+        batch.append((reader.line_num, values))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _normalize_dates(batch: List[Tuple[int, dict]], field: str):
+    # Extratos costumam trazer só a data (AAAA-MM-DD)
+    for _, values in batch:
+        value = values.get(field)
+        if value and len(value) == 10:
+            values[field] = f"{value}T00:00:00"
+
+def _validate(batch: List[Tuple[int, dict]], schema: type) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+    valid, errors = [], []
+    for line, values in batch:
+        try:
+            valid.append((line, schema(**values)))
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            errors.append({"row": line, "error": message})
+    return valid, errors
+
+def _check_rows(batch: List[Tuple[int, dict]], schema: type, date_field: str):
+    _normalize_dates(batch, date_field)
+    return _validate(batch, schema)
+
+async def _run_sync(fn, *args):
+    # Decodificar o CSV e validar milhares de linhas é CPU: fora do event loop, como o bcrypt e o yfinance
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, fn, *args)
+
+async def _existing_ids(session: AsyncSession, column, ids: set) -> set:
+    if not ids:
+        return set()
+    result = await session.execute(select(column).where(column.in_(ids)))
+    return set(result.scalars())
+
+async def _load_records(session: AsyncSession, model, columns: List[str], records: List[dict]):
+    """COPY pelo asyncpg quando disponível; senão um INSERT multi-linha"""
+    if not records:
+        return
+    
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        tuples = [
+            tuple(value.name if isinstance(value, ModelMovementType) else value for value in (record[c] for c in columns))
+            for record in records
+        ]
+        await raw.driver_connection.copy_records_to_table(model.__tablename__, records=tuples, columns=columns)
+    else:
+        await session.execute(insert(model), records)
+
+async def _prepare_movements(session: AsyncSession, batch) -> Tuple[List[dict], List[dict]]:
+    valid, errors = await _run_sync(_check_rows, batch, MovementCreate, "date")
+    clients = await _existing_ids(session, Client.id, {movement.client_id for _, movement in valid})
+    
+    records = []
+    for line, movement in valid:
+        if movement.client_id not in clients:
+            errors.append({"row": line, "error": "Cliente não encontrado"})
+            continue
+        records.append({
+            "client_id": movement.client_id,
+            "type": ModelMovementType(movement.type.value),
+            "amount": movement.amount,
+            "date": movement.date,
+            "note": movement.note,
+        })
+    return records, errors
+
+async def _prepare_allocations(session: AsyncSession, batch) -> Tuple[List[dict], List[dict]]:
+    errors = []
+    
+    # Linhas podem trazer o ticker no lugar do asset_id
+    tickers = {values["ticker"].upper() for _, values in batch if not values.get("asset_id") and values.get("ticker")}
+    if tickers:
+        result = await session.execute(select(Asset.ticker, Asset.id).where(Asset.ticker.in_(tickers)))
+        asset_by_ticker = dict(result.all())
+        resolved = []
+        for line, values in batch:
+            if not values.get("asset_id") and values.get("ticker"):
+                values["asset_id"] = asset_by_ticker.get(values["ticker"].upper())
+                if values["asset_id"] is None:
+                    errors.append({"row": line, "error": f"Ativo {values['ticker'].upper()} não encontrado"})
+                    continue
+            resolved.append((line, values))
+        batch = resolved
+    
+    valid, validation_errors = await _run_sync(_check_rows, batch, AllocationCreate, "buy_date")
+    errors.extend(validation_errors)
+    clients = await _existing_ids(session, Client.id, {allocation.client_id for _, allocation in valid})
+    assets = await _existing_ids(session, Asset.id, {allocation.asset_id for _, allocation in valid})
+    
+    records = []
+    for line, allocation in valid:
+        if allocation.client_id not in clients:
+            errors.append({"row": line, "error": "Cliente não encontrado"})
+        elif allocation.asset_id not in assets:
+            errors.append({"row": line, "error": "Ativo não encontrado"})
+        else:
+            records.append({column: getattr(allocation, column) for column in ALLOCATION_COLUMNS})
+    return records, errors
+
+async def _import(session: AsyncSession, file: BinaryIO, model, columns: List[str], prepare, after_load=None) -> dict:
+    total_rows = 0
+    imported = 0
+    failed = 0
+    errors = []
+    
+    batches = _read_csv_batches(file)
+    while True:
+        # Leitura e parse do próximo lote na thread; o INSERT do lote segue no event loop
+        batch = await _run_sync(next, batches, None)
+        if batch is None:
+            break
+        total_rows += len(batch)
+        records, batch_errors = await prepare(session, batch)
+        await _load_records(session, model, columns, records)
+        if after_load is not None and records:
+            await after_load(session, records)
+        imported += len(records)
+        failed += len(batch_errors)
+        errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    
+    await session.commit()
+    return {
+        "total_rows": total_rows,
+        "imported": imported,
+        "failed": failed,
+        "errors": sorted(errors, key=lambda error: error["row"]),
+    }
+
+async def import_movements(session: AsyncSession, file: BinaryIO) -> dict:
+    return await _import(session, file, Movement, MOVEMENT_COLUMNS, _prepare_movements, apply_imported_movements)
+
+async def import_allocations(session: AsyncSession, file: BinaryIO) -> dict:
+    return await _import(session, file, Allocation, ALLOCATION_COLUMNS, _prepare_allocations, apply_allocations)
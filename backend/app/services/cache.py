@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+# Contadores de versão por tabela: toda rota de escrita incrementa os da tabela alterada
+_table_versions = defaultdict(int)
+
+def bump_version(*tables: str):
+    """Marca as tabelas como alteradas, invalidando o que foi calculado a partir delas"""
+    for table in tables:
+        _table_versions[table] += 1
+
+def get_versions(tables: Iterable[str]) -> tuple:
+    return tuple(_table_versions[table] for table in tables)
+
+# Caches com nome, expostos em /metrics (acertos, falhas e tamanho)
+_named_caches = {}
+
+def _register(cache, name: Optional[str]):
+    if name is not None:
+        _named_caches[name] = cache
+
+def cache_stats() -> dict:
+    return {
+        name: {"hits": cache.hits, "misses": cache.misses, "size": len(cache)}
+        for name, cache in _named_caches.items()
+    }
+
+class VersionedCache:
+    """Cache LRU em memória cujas entradas valem enquanto as tabelas de origem não mudarem
+
+    `get` devolve também as versões conferidas, lidas antes da query; `set` recebe essas
+    versões e só guarda se nenhuma escrita aconteceu no meio. Assim um resultado calculado
+    durante uma escrita concorrente nunca fica marcado com a versão posterior a ela.
+    """
+
+    def __init__(self, tables: Iterable[str], maxsize: int = 128, name: Optional[str] = None):
+        self.tables = tuple(tables)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        _register(self, name)
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], tuple]:
+        """(valor ou None, versões atuais das tabelas), para repassar ao `set`"""
+        current = get_versions(self.tables)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, current
+        versions, value = entry
+        if versions != current:
+            del self._entries[key]
+            self.misses += 1
+            return None, current
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value, current
+
+    def set(self, key: Hashable, value: Any, versions: tuple) -> bool:
+        """Guarda o valor calculado a partir de `versions`; descarta se as tabelas mudaram desde então"""
+        if versions != get_versions(self.tables):
+            return False
+        self._entries[key] = (versions, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class TTLCache:
+    """Cache LRU em memória com expiração por entrada"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        _register(self, name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
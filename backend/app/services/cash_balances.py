@@ -0,0 +1,237 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, case, delete, exists, func, insert, literal_column, null, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.cash_balance import CashBalance
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+
+# Diferença aceita entre o saldo gravado e a soma das movimentações (ordem das somas em float)
+BALANCE_TOLERANCE = 0.005
+
+# Clientes por comando no recálculo parcial (limite de parâmetros do SQLite)
+REBUILD_CHUNK = 500
+
+def day_expression(dialect_name: str):
+    """Dia (UTC) da movimentação, calculado pelo banco"""
+    if dialect_name == "sqlite":
+        # O SQLite grava o datetime sem fuso: o dia é o da própria string
+        return func.date(Movement.date)
+    # Literal, não parâmetro: a mesma expressão aparece no SELECT e no GROUP BY
+    return func.date(func.timezone(literal_column("'UTC'"), Movement.date))
+
+def movement_day(dialect_name: str, moment: datetime) -> date:
+    """Mesmo dia de day_expression, calculado em Python para o upsert"""
+    if dialect_name != "sqlite" and moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+def signed_amount():
+    return case((Movement.type == MovementType.DEPOSIT, Movement.amount), else_=-Movement.amount)
+
+def daily_balances_query(dialect_name: str, client_ids: Optional[List[int]] = None):
+    """Fluxo por (cliente, dia) e saldo acumulado até o fim de cada dia, direto das movimentações
+
+    O JOIN em clients deixa de fora movimentações órfãs anteriores à FK (ver migration 0004).
+    """
+    day = day_expression(dialect_name)
+    net_flow = func.sum(signed_amount())
+    query = (
+        select(
+            Movement.client_id.label("client_id"),
+            day.label("day"),
+            net_flow.label("net_flow"),
+            func.sum(net_flow).over(partition_by=Movement.client_id, order_by=day).label("balance"),
+        )
+        .join(Client, Client.id == Movement.client_id)
+        .group_by(Movement.client_id, day)
+    )
+    if client_ids is not None:
+        query = query.where(Movement.client_id.in_(client_ids))
+    return query
+
+def _differs(stored, computed):
+    return func.abs(stored - computed) > BALANCE_TOLERANCE
+
+async def _lock_clients(session: AsyncSession, client_ids: Iterable[int]):
+    # Serializa escritas de saldo por cliente (FOR UPDATE; ignorado pelo SQLite, que já serializa escritas)
+    await session.execute(
+        select(Client.id).where(Client.id.in_(sorted(client_ids))).order_by(Client.id).with_for_update()
+    )
+
+async def apply_movements(session: AsyncSession, movements: Iterable[dict]):
+    """Soma novas movimentações aos saldos, na transação da própria movimentação
+
+    Cada (cliente, dia) vira um upsert do dia mais um UPDATE dos dias posteriores:
+    uma movimentação retroativa corrige todos os saldos acumulados que vêm depois dela.
+    """
+    dialect_name = session.bind.dialect.name
+    deltas = defaultdict(float)
+    for movement in movements:
+        amount = movement["amount"] if movement["type"] == MovementType.DEPOSIT else -movement["amount"]
+        deltas[(movement["client_id"], movement_day(dialect_name, movement["date"]))] += amount
+    if not deltas:
+        return
+
+    await _lock_clients(session, {client_id for client_id, _ in deltas})
+    for (client_id, day), delta in sorted(deltas.items()):
+        await session.execute(
+            update(CashBalance)
+            .where(CashBalance.client_id == client_id, CashBalance.day > day)
+            .values(balance=CashBalance.balance + delta)
+        )
+        previous = (
+            select(CashBalance.balance)
+            .where(CashBalance.client_id == client_id, CashBalance.day < day)
+            .order_by(CashBalance.day.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = dialect_insert(session, CashBalance).values(
+            client_id=client_id,
+            day=day,
+            net_flow=delta,
+            balance=func.coalesce(previous, 0.0) + delta,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CashBalance.client_id, CashBalance.day],
+            set_={
+                "net_flow": CashBalance.net_flow + stmt.excluded.net_flow,
+                "balance": CashBalance.balance + stmt.excluded.net_flow,
+            },
+        )
+        await session.execute(stmt)
+
+async def refresh_client_balances(session: AsyncSession, client_ids: Iterable[int]):
+    """Recalcula os saldos dos clientes informados, sem commit (importação em lote)"""
+    client_ids = sorted(set(client_ids))
+    dialect_name = session.bind.dialect.name
+    for start in range(0, len(client_ids), REBUILD_CHUNK):
+        chunk = client_ids[start:start + REBUILD_CHUNK]
+        await _lock_clients(session, chunk)
+        await session.execute(delete(CashBalance).where(CashBalance.client_id.in_(chunk)))
+        await session.execute(
+            insert(CashBalance).from_select(
+                ["client_id", "day", "net_flow", "balance"], daily_balances_query(dialect_name, chunk)
+            )
+        )
+
+async def apply_imported_movements(session: AsyncSession, movements: List[dict]):
+    # Um lote importado toca muitos dias por cliente: recalcular é mais barato que upserts linha a linha
+    await refresh_client_balances(session, {movement["client_id"] for movement in movements})
+
+async def rebuild_cash_balances(session: AsyncSession, client_id: Optional[int] = None) -> int:
+    """Recalcula os saldos a partir de todas as movimentações (backfill / correção)"""
+    dialect_name = session.bind.dialect.name
+    client_ids = [client_id] if client_id is not None else None
+    clear = delete(CashBalance)
+    if client_id is not None:
+        clear = clear.where(CashBalance.client_id == client_id)
+
+    await session.execute(clear)
+    result = await session.execute(
+        insert(CashBalance).from_select(
+            ["client_id", "day", "net_flow", "balance"], daily_balances_query(dialect_name, client_ids)
+        )
+    )
+    await session.commit()
+    return result.rowcount
+
+async def balance_at(session: AsyncSession, client_id: int, at: date):
+    """(dia da última movimentação, saldo) ao fim de `at`; None se não há movimentação até lá"""
+    result = await session.execute(
+        select(CashBalance.day, CashBalance.balance)
+        .where(CashBalance.client_id == client_id, CashBalance.day <= at)
+        .order_by(CashBalance.day.desc())
+        .limit(1)
+    )
+    return result.first()
+
+def balances_at_query(at: date, after_id: Optional[int] = None):
+    """Saldo de cada cliente ao fim de `at`: uma busca na PK de cash_balances por cliente"""
+    latest = (
+        select(CashBalance.day)
+        .where(CashBalance.client_id == Client.id, CashBalance.day <= at)
+        .order_by(CashBalance.day.desc())
+        .limit(1)
+        .correlate(Client)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Client.id.label("client_id"),
+            Client.name.label("client_name"),
+            latest.label("as_of"),
+        )
+        .where(latest.is_not(None))
+    )
+    if after_id is not None:
+        query = query.where(Client.id > after_id)
+
+    snapshots = query.subquery()
+    return (
+        select(
+            snapshots.c.client_id,
+            snapshots.c.client_name,
+            snapshots.c.as_of,
+            CashBalance.balance,
+        )
+        .join(
+            CashBalance,
+            and_(CashBalance.client_id == snapshots.c.client_id, CashBalance.day == snapshots.c.as_of),
+        )
+        .order_by(snapshots.c.client_id)
+    )
+
+async def check_cash_balances(session: AsyncSession, client_id: Optional[int] = None, limit: int = 100) -> List[dict]:
+    """Compara os saldos gravados com os recalculados das movimentações
+
+    Devolve até `limit` divergências (dia faltando, sobrando ou com fluxo/saldo diferente).
+    """
+    dialect_name = session.bind.dialect.name
+    expected = daily_balances_query(dialect_name, [client_id] if client_id is not None else None).cte("expected")
+
+    wrong_or_missing = (
+        select(
+            expected.c.client_id,
+            expected.c.day,
+            expected.c.balance.label("expected_balance"),
+            CashBalance.balance.label("stored_balance"),
+        )
+        .select_from(expected)
+        .outerjoin(
+            CashBalance,
+            and_(CashBalance.client_id == expected.c.client_id, CashBalance.day == expected.c.day),
+        )
+        .where(
+            (CashBalance.client_id.is_(None))
+            | _differs(CashBalance.balance, expected.c.balance)
+            | _differs(CashBalance.net_flow, expected.c.net_flow)
+        )
+    )
+    extra = (
+        select(
+            CashBalance.client_id,
+            CashBalance.day,
+            null().label("expected_balance"),
+            CashBalance.balance.label("stored_balance"),
+        )
+        .where(
+            ~exists().where(
+                expected.c.client_id == CashBalance.client_id,
+                expected.c.day == CashBalance.day,
+            )
+        )
+    )
+    if client_id is not None:
+        extra = extra.where(CashBalance.client_id == client_id)
+
+    mismatches = union_all(wrong_or_missing, extra).subquery()
+    result = await session.execute(
+        select(mismatches).order_by(mismatches.c.client_id, mismatches.c.day).limit(limit)
+    )
+    return [dict(row._mapping) for row in result]
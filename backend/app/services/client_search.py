@@ -0,0 +1,76 @@
+from sqlalchemy import func, text, table, column, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.client import Client
+
+# FTS5 com tokenizer trigram só indexa termos com 3+ caracteres
+FTS_MIN_LENGTH = 3
+
+_sqlite_fts_ready = {}
+
+clients_fts = table("clients_fts", column("rowid"), column("rank"), column("name"), column("email"))
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _like_prefix(term: str) -> str:
+    return f"{_escape_like(term)}%"
+
+def _ilike_contains(term: str):
+    # ILIKE direto na coluna: é o operador que o índice gin_trgm_ops atende
+    pattern = f"%{_escape_like(term)}%"
+    return Client.name.ilike(pattern, escape="\\") | Client.email.ilike(pattern, escape="\\")
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+async def _has_sqlite_fts(session: AsyncSession) -> bool:
+    key = str(session.bind.url)
+    if key not in _sqlite_fts_ready:
+        result = await session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'clients_fts'"))
+        _sqlite_fts_ready[key] = result.scalar() is not None
+    return _sqlite_fts_ready[key]
+
+async def apply_client_search(session: AsyncSession, query, search: str, prefix: bool = False, ranked: bool = True):
+    """Aplica a busca por nome/e-mail usando os índices do banco em uso.
+
+    PostgreSQL: ILIKE atendido pelos índices GIN de trigramas e ordenado por
+    similarity(); no modo prefixo, LIKE sobre lower(...) text_pattern_ops.
+    SQLite: tabela FTS5 (trigram) criada pela migração 0002, ordenada por bm25.
+    Sem índice disponível cai no ILIKE simples.
+    """
+    term = search.strip()
+    if not term:
+        return query
+    
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        if prefix:
+            pattern = _like_prefix(term.lower())
+            return query.where(
+                func.lower(Client.name).like(pattern, escape="\\")
+                | func.lower(Client.email).like(pattern, escape="\\")
+            )
+        query = query.where(_ilike_contains(term))
+        if ranked:
+            rank = func.greatest(func.similarity(Client.name, term), func.similarity(Client.email, term))
+            query = query.order_by(rank.desc())
+        return query
+    
+    if dialect == "sqlite" and len(term) >= FTS_MIN_LENGTH and await _has_sqlite_fts(session):
+        query = query.join(clients_fts, clients_fts.c.rowid == Client.id)
+        if prefix:
+            pattern = _like_prefix(term)
+            return query.where(
+                clients_fts.c.name.like(pattern, escape="\\") | clients_fts.c.email.like(pattern, escape="\\")
+            )
+        query = query.where(literal_column("clients_fts").op("MATCH")(_fts_phrase(term)))
+        if ranked:
+            query = query.order_by(clients_fts.c.rank)
+        return query
+    
+    if prefix:
+        return query.where(
+            Client.name.istartswith(term, autoescape=True) | Client.email.istartswith(term, autoescape=True)
+        )
+    return query.where(_ilike_contains(term))
@@ -0,0 +1,60 @@
+from typing import Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.cache import VersionedCache
+
+# Contagens exatas reaproveitadas até a próxima escrita na tabela
+_count_caches = {}
+
+def _count_cache(table_name: str) -> VersionedCache:
+    if table_name not in _count_caches:
+        _count_caches[table_name] = VersionedCache([table_name], maxsize=256, name=f"row_counts_{table_name}")
+    return _count_caches[table_name]
+
+async def estimated_table_rows(session: AsyncSession, table_name: str) -> Optional[int]:
+    """Total estimado pelas estatísticas do planner (pg_class.reltuples), sem varrer a tabela"""
+    if session.bind.dialect.name != "postgresql":
+        return None
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name}
+    )
+    estimate = result.scalar()
+    # -1 indica tabela ainda não analisada
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+async def count_rows(
+    session: AsyncSession,
+    count_query,
+    table_name: str,
+    mode: str = "exact",
+    cache_key: Hashable = None,
+    filtered: bool = False,
+):
+    """Total de linhas conforme o modo pedido; devolve (total, é_estimativa).
+
+    - exact: COUNT(*) a cada chamada;
+    - cached: COUNT(*) reaproveitado até a próxima escrita na tabela;
+    - estimated: reltuples do PostgreSQL na listagem sem filtros, ou o
+      COUNT em cache quando há filtros ou o banco não tem estatísticas.
+    """
+    if mode == "estimated" and not filtered:
+        estimate = await estimated_table_rows(session, table_name)
+        if estimate is not None:
+            return estimate, True
+    
+    if mode in ("cached", "estimated"):
+        cache = _count_cache(table_name)
+        total, versions = cache.get(cache_key)
+        if total is None:
+            result = await session.execute(count_query)
+            total = result.scalar()
+            cache.set(cache_key, total, versions)
+        return total, False
+    
+    result = await session.execute(count_query)
+    return result.scalar(), False
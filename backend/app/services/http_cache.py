@@ -0,0 +1,76 @@
+import hashlib
+import os
+import uuid
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.services.cache import VersionedCache, get_versions
+
+HTTP_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", "512"))
+
+# Os contadores de versão são por processo: o id do processo entra na ETag para que
+# outro worker nunca responda 304 para uma versão que não é a dele
+_PROCESS_TAG = uuid.uuid4().hex[:8]
+
+_adapters = {}
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+class ResponseCache:
+    """Respostas GET serializadas, com ETag derivada das versões das tabelas de origem
+
+    `lookup` responde 304 (If-None-Match) ou devolve o corpo guardado sem tocar no banco;
+    `respond` serializa o resultado da rota, guarda no LRU e devolve a resposta com ETag.
+    """
+
+    def __init__(self, tables: Iterable[str], name: str, maxsize: int = HTTP_CACHE_SIZE):
+        self.tables = tuple(tables)
+        self.name = name
+        self._bodies = VersionedCache(self.tables, maxsize=maxsize, name=f"http_{name}")
+
+    def _key(self, request: Request) -> tuple:
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def etag(self, request: Request, versions: tuple) -> str:
+        versions = ".".join(str(version) for version in versions)
+        digest = hashlib.blake2b(repr(self._key(request)).encode(), digest_size=6).hexdigest()
+        return f'W/"{self.name}-{_PROCESS_TAG}-{versions}-{digest}"'
+
+    def _headers(self, etag: str) -> dict:
+        # O navegador guarda, mas sempre revalida com If-None-Match
+        return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    def lookup(self, request: Request) -> Optional[Response]:
+        # Versões lidas antes da query: uma escrita concorrente gera outra ETag, nunca um corpo velho com ETag nova
+        versions = get_versions(self.tables)
+        etag = self.etag(request, versions)
+        request.state.cache_versions = versions
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                self._bodies.hits += 1
+                return Response(status_code=304, headers=self._headers(etag))
+
+        body, _ = self._bodies.get(self._key(request))
+        if body is None:
+            return None
+        return Response(content=body, media_type="application/json", headers=self._headers(etag))
+
+    def respond(self, request: Request, payload: Any, response_type) -> Response:
+        adapter = _adapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+        versions = getattr(request.state, "cache_versions", None)
+        if versions is None:
+            versions = get_versions(self.tables)
+        self._bodies.set(self._key(request), body, versions)
+        return Response(content=body, media_type="application/json", headers=self._headers(self.etag(request, versions)))
+
+    def clear(self):
+        self._bodies.clear()
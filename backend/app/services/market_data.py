@@ -0,0 +1,206 @@
+import asyncio
+import json
+import math
+import os
+import random
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.services.cache import TTLCache
+
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo")
+MARKET_DATA_STUB_FILE = os.getenv("MARKET_DATA_STUB_FILE")
+MARKET_DATA_WORKERS = int(os.getenv("MARKET_DATA_WORKERS", "8"))
+MARKET_DATA_CACHE_SIZE = int(os.getenv("MARKET_DATA_CACHE_SIZE", "4096"))
+MARKET_DATA_CACHE_TTL = float(os.getenv("MARKET_DATA_CACHE_TTL", "3600"))
+MARKET_DATA_NEGATIVE_TTL = float(os.getenv("MARKET_DATA_NEGATIVE_TTL", "300"))
+MARKET_DATA_STUB_SEED = int(os.getenv("MARKET_DATA_STUB_SEED", "0"))
+
+class MarketDataProvider(ABC):
+    """Interface dos provedores de dados de mercado.
+
+    Os métodos são síncronos (bibliotecas como o yfinance bloqueiam) e o
+    MarketDataService os executa em um pool de threads.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def fetch_asset_info(self, ticker: str) -> Optional[dict]:
+        """Retorna {"ticker", "name", "exchange", "currency"} ou None se o ticker não existe"""
+
+    @abstractmethod
+    def fetch_price_history(self, tickers: List[str], start: date) -> Dict[str, List[dict]]:
+        """Barras diárias a partir de `start` para vários tickers em uma chamada.
+
+        Cada barra é {"date", "open", "high", "low", "close", "volume"};
+        tickers sem dados ficam de fora do resultado.
+        """
+
+    @abstractmethod
+    def fetch_quotes(self, tickers: List[str]) -> Dict[str, dict]:
+        """Cotação mais recente de vários tickers em uma chamada.
+
+        Cada cotação é {"price", "timestamp"}; tickers sem cotação ficam de fora.
+        """
+
+class StubMarketDataProvider(MarketDataProvider):
+    """Provedor local e determinístico, para testes e desenvolvimento offline"""
+
+    name = "stub"
+
+    def __init__(
+        self,
+        assets: Optional[Dict[str, dict]] = None,
+        prices: Optional[Dict[str, List[dict]]] = None,
+        path: Optional[str] = None,
+        seed: int = MARKET_DATA_STUB_SEED,
+    ):
+        data = {}
+        if path:
+            with open(path, encoding="utf-8") as stub_file:
+                data = json.load(stub_file)
+        self.assets = {ticker.upper(): info for ticker, info in data.get("assets", {}).items()}
+        self.assets.update({ticker.upper(): info for ticker, info in (assets or {}).items()})
+        self.prices = {ticker.upper(): bars for ticker, bars in data.get("prices", {}).items()}
+        self.prices.update({ticker.upper(): bars for ticker, bars in (prices or {}).items()})
+        self.seed = seed
+        self.calls = 0
+        self._quotes: Dict[str, tuple] = {}
+
+    def fetch_asset_info(self, ticker: str) -> Optional[dict]:
+        self.calls += 1
+        info = self.assets.get(ticker.upper())
+        if info is None:
+            return None
+        return {
+            "ticker": ticker.upper(),
+            "name": info.get("name", ticker.upper()),
+            "exchange": info.get("exchange", ""),
+            "currency": info.get("currency", "BRL"),
+        }
+
+    def fetch_price_history(self, tickers: List[str], start: date) -> Dict[str, List[dict]]:
+        self.calls += 1
+        history = {}
+        for ticker in tickers:
+            bars = []
+            for bar in self.prices.get(ticker.upper(), []):
+                bar_date = bar["date"]
+                if isinstance(bar_date, str):
+                    bar_date = date.fromisoformat(bar_date)
+                if bar_date >= start:
+                    bars.append({**bar, "date": bar_date})
+            if bars:
+                history[ticker] = bars
+        return history
+
+    def _base_price(self, ticker: str) -> float:
+        bars = self.prices.get(ticker)
+        if bars:
+            return float(bars[-1]["close"])
+        return 10.0 + zlib.crc32(ticker.encode()) % 49000 / 100
+
+    def _step(self, ticker: str, tick: int) -> float:
+        # Retorno do tick n depende só de (seed, ticker, n): o passeio é reproduzível
+        rng = random.Random(zlib.crc32(f"{self.seed}:{ticker}:{tick}".encode()))
+        return math.exp(rng.gauss(0.0, 0.002))
+
+    def fetch_quotes(self, tickers: List[str]) -> Dict[str, dict]:
+        # Cada chamada avança um tick por ticker: a mesma sequência de chamadas gera os mesmos preços
+        self.calls += 1
+        now = datetime.now(timezone.utc)
+        quotes = {}
+        for ticker in tickers:
+            key = ticker.upper()
+            tick, price = self._quotes.get(key, (0, self._base_price(key)))
+            tick += 1
+            price *= self._step(key, tick)
+            self._quotes[key] = (tick, price)
+            quotes[ticker] = {"price": round(price, 2), "timestamp": now}
+        return quotes
+
+class MarketDataService:
+    """Consultas ao provedor fora do event loop, com cache e deduplicação.
+
+    - cache TTL/LRU para tickers válidos e cache negativo para inválidos;
+    - requisições simultâneas do mesmo ticker compartilham uma única chamada
+      ao provedor (single-flight);
+    - as chamadas rodam em um ThreadPoolExecutor limitado.
+    """
+
+    def __init__(
+        self,
+        provider: MarketDataProvider,
+        max_workers: int = MARKET_DATA_WORKERS,
+        cache_size: int = MARKET_DATA_CACHE_SIZE,
+        cache_ttl: float = MARKET_DATA_CACHE_TTL,
+        negative_ttl: float = MARKET_DATA_NEGATIVE_TTL,
+    ):
+        self.provider = provider
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, name="market_data")
+        self._negative = TTLCache(maxsize=cache_size, ttl=negative_ttl, name="market_data_negative")
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, fn: Callable, *args):
+        """Executa uma chamada bloqueante do provedor no pool de threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def get_asset_info(self, ticker: str) -> Optional[dict]:
+        ticker = ticker.upper()
+        
+        cached = self._cache.get(ticker)
+        if cached is not None:
+            return cached
+        if self._negative.get(ticker):
+            return None
+        
+        # Single-flight: quem chega depois aguarda a mesma consulta
+        inflight = self._inflight.get(ticker)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load_asset_info(ticker))
+            self._inflight[ticker] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(ticker, None))
+        return await asyncio.shield(inflight)
+
+    async def _load_asset_info(self, ticker: str) -> Optional[dict]:
+        info = await self.run(self.provider.fetch_asset_info, ticker)
+        if info is None:
+            self._negative.set(ticker, True)
+        else:
+            self._cache.set(ticker, info)
+        return info
+
+    def clear(self):
+        self._cache.clear()
+        self._negative.clear()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_service: Optional[MarketDataService] = None
+
+def _default_provider() -> MarketDataProvider:
+    if MARKET_DATA_PROVIDER == "stub":
+        return StubMarketDataProvider(path=MARKET_DATA_STUB_FILE)
+    from app.services.yahoo_finance import YahooFinanceProvider
+    return YahooFinanceProvider()
+
+def get_market_data() -> MarketDataService:
+    global _service
+    if _service is None:
+        _service = MarketDataService(_default_provider())
+    return _service
+
+def set_market_data_provider(provider: MarketDataProvider, **options) -> MarketDataService:
+    """Troca o provedor (ex.: StubMarketDataProvider nos testes), descartando os caches"""
+    global _service
+    if _service is not None:
+        _service.shutdown()
+    _service = MarketDataService(provider, **options)
+    return _service
@@ -0,0 +1,117 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.movement import Movement, MovementType
+from app.models.client import Client
+
+def period_expression(dialect_name: str, group_by: str):
+    """Rótulo do período ("2024-01" / "2024-W01") calculado pelo próprio banco"""
+    if dialect_name == "sqlite":
+        if group_by == "month":
+            return func.strftime("%Y-%m", Movement.date)
+        # Semana ISO como no IYYY-IW do PostgreSQL (%G/%V só existem a partir do SQLite 3.46):
+        # a quinta-feira da semana define o ano, e o dia do ano dela, o número da semana
+        thursday = func.date(Movement.date, "-3 days", "weekday 4")
+        week = (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1
+        return func.printf("%s-W%02d", func.strftime("%Y", thursday), week)
+    fmt = "YYYY-MM" if group_by == "month" else 'IYYY-"W"IW'
+    return func.to_char(Movement.date, fmt)
+
+def movement_summary_query(
+    dialect_name: str,
+    client_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Optional[str] = None,
+):
+    """GROUP BY client_id, type (e período, se pedido) sobre as movimentações filtradas"""
+    columns = [
+        Movement.client_id,
+        Client.name.label("client_name"),
+        Movement.type,
+        func.sum(Movement.amount).label("amount"),
+    ]
+    group_columns = [Movement.client_id, Client.name, Movement.type]
+    
+    if group_by:
+        period = period_expression(dialect_name, group_by).label("period")
+        columns.append(period)
+        group_columns.append(period)
+    
+    # LEFT JOIN: movimentações órfãs (anteriores à FK, ver migration 0004) continuam nos totais
+    query = (
+        select(*columns)
+        .select_from(Movement)
+        .outerjoin(Client, Client.id == Movement.client_id)
+        .group_by(*group_columns)
+    )
+    
+    if client_id:
+        query = query.where(Movement.client_id == client_id)
+    
+    if start_date:
+        query = query.where(Movement.date >= start_date)
+    
+    if end_date:
+        query = query.where(Movement.date <= end_date)
+    
+    return query
+
+async def summarize_movements(
+    session: AsyncSession,
+    client_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Optional[str] = None,
+    breakdown: bool = True,
+) -> dict:
+    """Totais e resumo por cliente em um único GROUP BY client_id, type"""
+    query = movement_summary_query(session.bind.dialect.name, client_id, start_date, end_date, group_by)
+    result = await session.execute(query)
+    
+    total_deposits = 0.0
+    total_withdrawals = 0.0
+    summary = {}
+    for row in result.mappings():
+        is_deposit = row["type"] == MovementType.DEPOSIT
+        if is_deposit:
+            total_deposits += row["amount"]
+        else:
+            total_withdrawals += row["amount"]
+        
+        if not breakdown or row["client_name"] is None:
+            continue
+        
+        key = (row["client_id"], row["period"]) if group_by else row["client_id"]
+        entry = summary.get(key)
+        if entry is None:
+            entry = summary[key] = {
+                "client_id": row["client_id"],
+                "client_name": row["client_name"],
+                "total_deposits": 0.0,
+                "total_withdrawals": 0.0,
+                "net_flow": 0.0,
+            }
+            if group_by:
+                entry["period"] = row["period"]
+        
+        if is_deposit:
+            entry["total_deposits"] += row["amount"]
+        else:
+            entry["total_withdrawals"] += row["amount"]
+        entry["net_flow"] = entry["total_deposits"] - entry["total_withdrawals"]
+    
+    client_summary = sorted(
+        summary.values(),
+        key=lambda entry: (entry["client_id"], entry.get("period") or "")
+    )
+    
+    return {
+        "total_deposits": total_deposits,
+        "total_withdrawals": total_withdrawals,
+        "net_flow": total_deposits - total_withdrawals,
+        "client_summary": client_summary,
+    }
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.asset import Asset, Allocation
+from app.models.position import Position
+
+def _average_cost(quantity, total_invested):
+    return case((quantity == 0, 0.0), else_=total_invested / quantity)
+
+async def apply_allocations(session: AsyncSession, allocations: Iterable[dict]):
+    """Soma novos lotes às posições com um upsert, na transação da própria alocação
+
+    Os lotes são agregados por (cliente, ativo) antes: o ON CONFLICT não pode tocar
+    a mesma linha duas vezes no mesmo comando.
+    """
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for allocation in allocations:
+        entry = totals[(allocation["client_id"], allocation["asset_id"])]
+        entry[0] += allocation["quantity"]
+        entry[1] += allocation["quantity"] * allocation["buy_price"]
+    if not totals:
+        return
+    
+    rows = [
+        {
+            "client_id": client_id,
+            "asset_id": asset_id,
+            "quantity": quantity,
+            "average_cost": total_invested / quantity if quantity else 0.0,
+            "total_invested": total_invested,
+        }
+        for (client_id, asset_id), (quantity, total_invested) in totals.items()
+    ]
+    stmt = dialect_insert(session, Position)
+    quantity = Position.quantity + stmt.excluded.quantity
+    total_invested = Position.total_invested + stmt.excluded.total_invested
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Position.client_id, Position.asset_id],
+        set_={
+            "quantity": quantity,
+            "total_invested": total_invested,
+            "average_cost": _average_cost(quantity, total_invested),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt, rows)
+
+async def rebuild_positions(session: AsyncSession, client_id: Optional[int] = None) -> int:
+    """Recalcula as posições a partir de todas as alocações (backfill / correção)"""
+    quantity = func.sum(Allocation.quantity)
+    total_invested = func.sum(Allocation.quantity * Allocation.buy_price)
+    source = (
+        select(
+            Allocation.client_id,
+            Allocation.asset_id,
+            quantity,
+            _average_cost(quantity, total_invested),
+            total_invested,
+        )
+        .group_by(Allocation.client_id, Allocation.asset_id)
+    )
+    
+    clear = delete(Position)
+    if client_id is not None:
+        source = source.where(Allocation.client_id == client_id)
+        clear = clear.where(Position.client_id == client_id)
+    
+    await session.execute(clear)
+    result = await session.execute(
+        insert(Position).from_select(
+            ["client_id", "asset_id", "quantity", "average_cost", "total_invested"], source
+        )
+    )
+    await session.commit()
+    return result.rowcount
+
+def positions_query(client_id: Optional[int] = None, asset_id: Optional[int] = None):
+    """Posições com ticker e nome do ativo: uma linha por ativo em carteira"""
+    query = (
+        select(
+            Position.client_id,
+            Position.asset_id,
+            Asset.ticker.label("asset_ticker"),
+            Asset.name.label("asset_name"),
+            Position.quantity,
+            Position.average_cost,
+            Position.total_invested,
+            Position.updated_at,
+        )
+        .join(Asset, Asset.id == Position.asset_id)
+    )
+    if client_id is not None:
+        query = query.where(Position.client_id == client_id)
+    if asset_id is not None:
+        query = query.where(Position.asset_id == asset_id)
+    return query
@@ -0,0 +1,153 @@
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.asset import Asset
+from app.models.price import Price
+from app.services.market_data import get_market_data
+
+# Quanto histórico buscar para um ativo que ainda não tem nenhuma barra
+PRICE_HISTORY_START_DAYS = int(os.getenv("PRICE_HISTORY_START_DAYS", "365"))
+PRICE_REFRESH_BATCH_SIZE = int(os.getenv("PRICE_REFRESH_BATCH_SIZE", "50"))
+PRICE_INSERT_CHUNK_SIZE = 1000
+
+async def refresh_prices(
+    session: AsyncSession,
+    asset_ids: Optional[List[int]] = None,
+    batch_size: int = PRICE_REFRESH_BATCH_SIZE,
+    today: Optional[date] = None,
+    fetch: Optional[Callable[[List[str], date], Awaitable[Dict[str, List[dict]]]]] = None,
+    refetch_last: bool = False,
+) -> dict:
+    """Atualização incremental: busca só as datas após a última barra de cada ativo
+
+    `fetch(tickers, start)` substitui a chamada direta ao provedor (ex.: com limite de
+    taxa e retry). Com `refetch_last` a última barra é buscada de novo e sobrescrita:
+    o fechamento do dia corrente muda ao longo do pregão.
+    """
+    today = today or date.today()
+    
+    # Última barra armazenada de cada ativo, em uma única query
+    stmt = (
+        select(Asset.id, Asset.ticker, func.max(Price.date).label("last_date"))
+        .outerjoin(Price, Price.asset_id == Asset.id)
+        .group_by(Asset.id, Asset.ticker)
+    )
+    if asset_ids is not None:
+        stmt = stmt.where(Asset.id.in_(asset_ids))
+    result = await session.execute(stmt)
+    assets = result.all()
+    
+    # Ativos com a mesma data inicial vão juntos na mesma chamada ao provedor
+    by_start = defaultdict(list)
+    for asset in assets:
+        if asset.last_date:
+            start = asset.last_date if refetch_last else asset.last_date + timedelta(days=1)
+        else:
+            start = today - timedelta(days=PRICE_HISTORY_START_DAYS)
+        if start <= today:
+            by_start[start].append(asset)
+    
+    if fetch is None:
+        market_data = get_market_data()
+        
+        async def fetch(tickers: List[str], start: date) -> Dict[str, List[dict]]:
+            return await market_data.run(market_data.provider.fetch_price_history, tickers, start)
+    
+    provider_calls = 0
+    failed = []
+    rows = []
+    for start, group in by_start.items():
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            ids_by_ticker = {asset.ticker: asset.id for asset in batch}
+            provider_calls += 1
+            try:
+                history = await fetch(list(ids_by_ticker), start)
+            except Exception as e:
+                print(f"❌ Erro ao buscar preços de {list(ids_by_ticker)}: {str(e)}")
+                failed.extend(ids_by_ticker)
+                continue
+            
+            for ticker, bars in history.items():
+                asset_id = ids_by_ticker.get(ticker)
+                if asset_id is None:
+                    continue
+                rows.extend(
+                    {
+                        "asset_id": asset_id,
+                        "date": bar["date"],
+                        "open": bar.get("open"),
+                        "high": bar.get("high"),
+                        "low": bar.get("low"),
+                        "close": bar["close"],
+                        "volume": bar.get("volume"),
+                    }
+                    for bar in bars
+                    if start <= bar["date"] <= today
+                )
+    
+    inserted = await insert_prices(session, rows, update_existing=refetch_last)
+    await session.commit()
+    
+    return {
+        "assets": len(assets),
+        "provider_calls": provider_calls,
+        "inserted": inserted,
+        "failed": failed,
+    }
+
+async def insert_prices(session: AsyncSession, rows: List[dict], update_existing: bool = False) -> int:
+    """INSERT multi-linha em blocos; barras já existentes são ignoradas (ou sobrescritas)
+
+    Devolve as linhas gravadas: inseridas mais, com `update_existing`, as que mudaram de valor.
+    """
+    inserted = 0
+    columns = ("open", "high", "low", "close", "volume")
+    for i in range(0, len(rows), PRICE_INSERT_CHUNK_SIZE):
+        stmt = dialect_insert(session, Price).values(rows[i:i + PRICE_INSERT_CHUNK_SIZE])
+        if update_existing:
+            # Barra igual à gravada não é reescrita nem contada: o rowcount indica se algo mudou
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Price.asset_id, Price.date],
+                set_={column: stmt.excluded[column] for column in columns},
+                where=or_(*(getattr(Price, column).is_distinct_from(stmt.excluded[column]) for column in columns)),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Price.asset_id, Price.date])
+        result = await session.execute(stmt)
+        inserted += max(result.rowcount, 0)
+    return inserted
+
+async def get_price_history(
+    session: AsyncSession,
+    asset_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[Price]:
+    stmt = select(Price).where(Price.asset_id == asset_id)
+    if start:
+        stmt = stmt.where(Price.date >= start)
+    if end:
+        stmt = stmt.where(Price.date <= end)
+    result = await session.execute(stmt.order_by(Price.date))
+    return result.scalars().all()
+
+async def load_latest_prices(session: AsyncSession, asset_ids: Optional[List[int]] = None) -> List[tuple]:
+    """Último fechamento de cada ativo: [(asset_id, date, close), ...]"""
+    last_dates = select(Price.asset_id, func.max(Price.date).label("last_date")).group_by(Price.asset_id)
+    if asset_ids is not None:
+        last_dates = last_dates.where(Price.asset_id.in_(asset_ids))
+    last_dates = last_dates.subquery()
+    
+    stmt = (
+        select(Price.asset_id, Price.date, Price.close)
+        .join(last_dates, (Price.asset_id == last_dates.c.asset_id) & (Price.date == last_dates.c.last_date))
+    )
+    result = await session.execute(stmt)
+    return result.all()
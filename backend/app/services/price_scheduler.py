@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.position import Position
+from app.services.cache import bump_version
+from app.services.market_data import get_market_data
+from app.services.price_history import PRICE_REFRESH_BATCH_SIZE, refresh_prices
+
+logger = logging.getLogger(__name__)
+
+# Desligado por padrão: cada processo da API teria o próprio agendador e o próprio token bucket,
+# multiplicando as chamadas ao provedor. Ligue em um único processo (ex.: o backend do
+# docker-compose, que roda um só uvicorn) ou em um worker dedicado.
+PRICE_REFRESH_ENABLED = os.getenv("PRICE_REFRESH_ENABLED", "false").lower() in ("1", "true", "yes")
+# Intervalo entre execuções (s) e espera antes da primeira, para não competir com o boot
+PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "900"))
+PRICE_REFRESH_INITIAL_DELAY = float(os.getenv("PRICE_REFRESH_INITIAL_DELAY", "30"))
+# Token bucket das chamadas ao provedor: taxa sustentada (chamadas/s) e rajada
+PRICE_REFRESH_RATE = float(os.getenv("PRICE_REFRESH_RATE", "1"))
+PRICE_REFRESH_BURST = int(os.getenv("PRICE_REFRESH_BURST", "5"))
+# Novas tentativas por lote, com backoff exponencial e jitter
+PRICE_REFRESH_RETRIES = int(os.getenv("PRICE_REFRESH_RETRIES", "3"))
+PRICE_REFRESH_RETRY_BASE = float(os.getenv("PRICE_REFRESH_RETRY_BASE", "1"))
+PRICE_REFRESH_RETRY_MAX = float(os.getenv("PRICE_REFRESH_RETRY_MAX", "30"))
+
+class TokenBucket:
+    """Limite de taxa: `rate` fichas por segundo, acumulando no máximo `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Espera uma ficha; devolve quanto tempo esperou"""
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+def backoff_delay(attempt: int, base: float = PRICE_REFRESH_RETRY_BASE, cap: float = PRICE_REFRESH_RETRY_MAX) -> float:
+    # "Full jitter": espera aleatória até o teto exponencial, para as tentativas não sincronizarem
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class PriceRefreshScheduler:
+    """Atualização periódica dos preços dos ativos em carteira, iniciada no lifespan da API
+
+    Cada execução busca os ativos com posição aberta e reaproveita refresh_prices
+    (lotes de PRICE_REFRESH_BATCH_SIZE tickers por chamada, a partir da última barra);
+    cada chamada ao provedor passa pelo token bucket e é repetida com jitter em caso de erro.
+    """
+
+    def __init__(
+        self,
+        interval: float = PRICE_REFRESH_INTERVAL,
+        initial_delay: float = PRICE_REFRESH_INITIAL_DELAY,
+        rate: float = PRICE_REFRESH_RATE,
+        burst: int = PRICE_REFRESH_BURST,
+        retries: int = PRICE_REFRESH_RETRIES,
+        batch_size: int = PRICE_REFRESH_BATCH_SIZE,
+    ):
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.retries = retries
+        self.batch_size = batch_size
+        self.bucket = TokenBucket(rate, burst)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.runs = 0
+        self.run_failures = 0
+        self.run_seconds_total = 0.0
+        self.last_run_seconds = 0.0
+        self.last_run_at = 0.0
+        self.last_run_assets = 0
+        self.provider_calls = 0
+        self.provider_errors = 0
+        self.retries_total = 0
+        self.failed_tickers = 0
+        self.rows_written = 0
+        self.rate_limited_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "run_failures": self.run_failures,
+            "run_seconds_total": self.run_seconds_total,
+            "last_run_seconds": self.last_run_seconds,
+            "last_run_timestamp": self.last_run_at,
+            "last_run_assets": self.last_run_assets,
+            "provider_calls": self.provider_calls,
+            "provider_errors": self.provider_errors,
+            "retries": self.retries_total,
+            "failed_tickers": self.failed_tickers,
+            "rows_written": self.rows_written,
+            "rate_limited_seconds": self.rate_limited_seconds,
+        }
+
+    async def _fetch(self, tickers: List[str], start: date) -> Dict[str, List[dict]]:
+        market_data = get_market_data()
+        for attempt in range(self.retries + 1):
+            self.rate_limited_seconds += await self.bucket.acquire()
+            self.provider_calls += 1
+            try:
+                return await market_data.run(market_data.provider.fetch_price_history, tickers, start)
+            except Exception as e:
+                self.provider_errors += 1
+                if attempt == self.retries:
+                    raise
+                self.retries_total += 1
+                delay = backoff_delay(attempt)
+                logger.warning("Falha ao buscar preços de %d tickers (%s), nova tentativa em %.1f s",
+                               len(tickers), e, delay)
+                await asyncio.sleep(delay)
+
+    async def run_once(self) -> dict:
+        """Uma execução completa: ativos com posição aberta, do último preço até hoje"""
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(Position.asset_id).where(Position.quantity > 0).distinct()
+                )
+                asset_ids = list(result.scalars())
+                summary = await refresh_prices(
+                    session, asset_ids=asset_ids, batch_size=self.batch_size, fetch=self._fetch, refetch_last=True,
+                )
+        except Exception:
+            self.run_failures += 1
+            raise
+        finally:
+            self.runs += 1
+            self.last_run_seconds = time.perf_counter() - started
+            self.run_seconds_total += self.last_run_seconds
+            self.last_run_at = time.time()
+
+        if summary["inserted"]:
+            bump_version("prices")
+        self.last_run_assets = summary["assets"]
+        self.failed_tickers += len(summary["failed"])
+        self.rows_written += summary["inserted"]
+        logger.info("Preços atualizados: %d ativos, %d chamadas, %d barras, %d falhas em %.1f s",
+                    summary["assets"], summary["provider_calls"], summary["inserted"],
+                    len(summary["failed"]), self.last_run_seconds)
+        return summary
+
+    async def _loop(self):
+        delay = self.initial_delay
+        while True:
+            try:
+                # Acorda na hora se stop() for chamado durante a espera
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Falha na atualização agendada de preços")
+            delay = self.interval
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout: float = 10.0):
+        """Sinaliza a parada; uma execução em andamento tem `timeout` segundos antes de ser cancelada"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+price_scheduler = PriceRefreshScheduler()
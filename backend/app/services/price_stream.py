@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.database import AsyncSessionLocal
+from app.models.position import Position
+from app.services.cache import get_versions
+from app.services.market_data import get_market_data
+from app.services.positions import positions_query
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre buscas de cotação do poller compartilhado
+PRICE_STREAM_INTERVAL = float(os.getenv("PRICE_STREAM_INTERVAL", "5"))
+# Tickers por chamada ao provedor
+PRICE_STREAM_BATCH_SIZE = int(os.getenv("PRICE_STREAM_BATCH_SIZE", "100"))
+# Consumidor que não recebe um envio neste prazo é desconectado
+PRICE_STREAM_SEND_TIMEOUT = float(os.getenv("PRICE_STREAM_SEND_TIMEOUT", "10"))
+# Limite de tickers e carteiras assinados por conexão
+PRICE_STREAM_MAX_TICKERS = int(os.getenv("PRICE_STREAM_MAX_TICKERS", "500"))
+PRICE_STREAM_MAX_PORTFOLIOS = int(os.getenv("PRICE_STREAM_MAX_PORTFOLIOS", "50"))
+
+class Subscriber:
+    """Uma conexão de streaming: o que ela assina e as mensagens ainda não enviadas
+
+    As pendências são um dict por chave ("quote", ticker) / ("portfolio", client_id):
+    um consumidor lento recebe só o valor mais recente de cada chave, e a memória
+    fica limitada ao tamanho da assinatura, não à velocidade do feed.
+    """
+
+    def __init__(self):
+        self.tickers: Set[str] = set()
+        self.portfolios: Set[int] = set()
+        self.coalesced = 0
+        self._pending: Dict[tuple, dict] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, key: tuple, message: dict):
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = message
+        self._ready.set()
+
+    async def next_batch(self) -> List[dict]:
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._pending.values())
+        self._pending = {}
+        return batch
+
+class PriceHub:
+    """Poller único de cotações com fan-out para as conexões de streaming
+
+    Cada tick busca uma vez cada ticker assinado (por qualquer conexão, diretamente
+    ou via carteira), em lotes de PRICE_STREAM_BATCH_SIZE por chamada ao provedor,
+    e publica só as cotações que mudaram. O poller sobe com a primeira assinatura
+    e para quando a última conexão sai.
+    """
+
+    def __init__(self, interval: float = PRICE_STREAM_INTERVAL, batch_size: int = PRICE_STREAM_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.subscribers: Set[Subscriber] = set()
+        self.quotes: Dict[str, dict] = {}
+        # client_id -> [(ticker, quantidade, custo total)], recarregado quando allocations muda
+        self.positions: Dict[int, List[tuple]] = {}
+        self._positions_version = None
+        self._task: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.fetch_errors = 0
+        self.disconnects = 0
+        self._coalesced_closed = 0
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "tickers": len(self._watched_tickers()),
+            "ticks": self.ticks,
+            "fetch_errors": self.fetch_errors,
+            "coalesced": self._coalesced_closed + sum(subscriber.coalesced for subscriber in self.subscribers),
+            "slow_disconnects": self.disconnects,
+        }
+
+    def register(self, subscriber: Subscriber):
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unregister(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self._coalesced_closed += subscriber.coalesced
+
+    async def subscribe(self, subscriber: Subscriber, tickers: Iterable[str] = (), client_ids: Iterable[int] = ()):
+        tickers = {ticker.strip().upper() for ticker in tickers if ticker.strip()}
+        client_ids = set(client_ids)
+        if len(subscriber.tickers | tickers) > PRICE_STREAM_MAX_TICKERS:
+            raise ValueError(f"Máximo de {PRICE_STREAM_MAX_TICKERS} tickers por conexão")
+        if len(subscriber.portfolios | client_ids) > PRICE_STREAM_MAX_PORTFOLIOS:
+            raise ValueError(f"Máximo de {PRICE_STREAM_MAX_PORTFOLIOS} carteiras por conexão")
+
+        missing = client_ids - self.positions.keys()
+        if missing:
+            await self._load_positions(missing)
+        subscriber.tickers |= tickers
+        subscriber.portfolios |= client_ids
+
+        # Quem acabou de assinar recebe o último valor conhecido sem esperar o próximo tick
+        for ticker in tickers:
+            if ticker in self.quotes:
+                subscriber.push(("quote", ticker), self._quote_message(ticker, None))
+        for client_id in client_ids:
+            message = self._portfolio_message(client_id)
+            if message is not None:
+                subscriber.push(("portfolio", client_id), message)
+
+    def unsubscribe(self, subscriber: Subscriber, tickers: Iterable[str] = (), client_ids: Iterable[int] = ()):
+        subscriber.tickers -= {ticker.strip().upper() for ticker in tickers}
+        subscriber.portfolios -= set(client_ids)
+
+    def _watched_tickers(self) -> Set[str]:
+        tickers = set()
+        client_ids = set()
+        for subscriber in self.subscribers:
+            tickers |= subscriber.tickers
+            client_ids |= subscriber.portfolios
+        for client_id in client_ids:
+            tickers.update(ticker for ticker, _, _ in self.positions.get(client_id, ()))
+        return tickers
+
+    async def _load_positions(self, client_ids: Set[int]):
+        query = positions_query().where(Position.client_id.in_(sorted(client_ids)))
+        # Do primário: a recarga é disparada pela versão de allocations, que a réplica pode não ter ainda
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(query)
+            rows = result.all()
+        positions = defaultdict(list)
+        for row in rows:
+            positions[row.client_id].append((row.asset_ticker, row.quantity, row.total_invested))
+        for client_id in client_ids:
+            self.positions[client_id] = positions.get(client_id, [])
+
+    async def _refresh_positions(self):
+        # Carteiras mudam com novas alocações: recarrega todas as assinadas de uma vez
+        version = get_versions(("allocations",))
+        subscribed = set()
+        for subscriber in self.subscribers:
+            subscribed |= subscriber.portfolios
+        if version != self._positions_version:
+            self._positions_version = version
+            self.positions = {}
+            if subscribed:
+                await self._load_positions(subscribed)
+        else:
+            for client_id in set(self.positions) - subscribed:
+                del self.positions[client_id]
+
+    def _quote_message(self, ticker: str, previous: Optional[float]) -> dict:
+        quote = self.quotes[ticker]
+        return {
+            "type": "quote",
+            "ticker": ticker,
+            "price": quote["price"],
+            "previous": previous,
+            "timestamp": quote["timestamp"],
+        }
+
+    def _portfolio_message(self, client_id: int) -> Optional[dict]:
+        positions = self.positions.get(client_id)
+        if positions is None:
+            return None
+        market_value = 0.0
+        cost = 0.0
+        priced = 0
+        for ticker, quantity, total_invested in positions:
+            cost += total_invested
+            quote = self.quotes.get(ticker)
+            if quote is None:
+                # Sem cotação ainda: entra pelo custo
+                market_value += total_invested
+            else:
+                market_value += quantity * quote["price"]
+                priced += 1
+        return {
+            "type": "portfolio",
+            "client_id": client_id,
+            "market_value": market_value,
+            "cost": cost,
+            "unrealized_pnl": market_value - cost,
+            "positions": len(positions),
+            "priced_positions": priced,
+            "timestamp": datetime.now(timezone.utc),
+        }
+
+    async def _fetch(self, tickers: List[str]) -> Dict[str, dict]:
+        market_data = get_market_data()
+        quotes = {}
+        for start in range(0, len(tickers), self.batch_size):
+            batch = tickers[start:start + self.batch_size]
+            try:
+                quotes.update(await market_data.run(market_data.provider.fetch_quotes, batch))
+            except Exception:
+                # Um lote com erro não derruba o tick: os demais seguem e o próximo tick tenta de novo
+                self.fetch_errors += 1
+                logger.exception("Falha ao buscar cotações de %d tickers", len(batch))
+        return quotes
+
+    async def tick(self):
+        """Busca as cotações assinadas uma vez e distribui as que mudaram"""
+        await self._refresh_positions()
+        tickers = sorted(self._watched_tickers())
+        if not tickers:
+            return
+        fetched = await self._fetch(tickers)
+        self.ticks += 1
+
+        changed = {}
+        for ticker, quote in fetched.items():
+            previous = self.quotes.get(ticker)
+            if previous is None or previous["price"] != quote["price"]:
+                changed[ticker] = previous["price"] if previous else None
+            self.quotes[ticker] = quote
+        if not changed:
+            return
+
+        portfolio_messages = {}
+        for subscriber in list(self.subscribers):
+            for ticker in subscriber.tickers & changed.keys():
+                subscriber.push(("quote", ticker), self._quote_message(ticker, changed[ticker]))
+            for client_id in subscriber.portfolios:
+                if not any(ticker in changed for ticker, _, _ in self.positions.get(client_id, ())):
+                    continue
+                if client_id not in portfolio_messages:
+                    portfolio_messages[client_id] = self._portfolio_message(client_id)
+                subscriber.push(("portfolio", client_id), portfolio_messages[client_id])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self.subscribers:
+            started = loop.time()
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Falha no tick do streaming de cotações")
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+price_hub = PriceHub()
@@ -0,0 +1,77 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.models.asset import Asset, Allocation
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+
+# Queries de listagem compartilhadas entre as rotas de lista e de exportação
+
+def client_filters(is_active: Optional[bool] = None) -> List:
+    """Filtros simples de clientes; a busca textual fica em services.client_search"""
+    filters = []
+    if is_active is not None:
+        filters.append(Client.is_active == is_active)
+    return filters
+
+def allocation_rows_query(client_id: Optional[int] = None, asset_id: Optional[int] = None):
+    """Alocações já unidas a ativo e cliente, com o total investido calculado no SQL"""
+    query = (
+        select(
+            Allocation.id,
+            Allocation.client_id,
+            Allocation.asset_id,
+            Allocation.quantity,
+            Allocation.buy_price,
+            Allocation.buy_date,
+            Allocation.created_at,
+            Asset.ticker.label("asset_ticker"),
+            Asset.name.label("asset_name"),
+            Client.name.label("client_name"),
+            (Allocation.quantity * Allocation.buy_price).label("total_invested"),
+        )
+        .join(Asset, Asset.id == Allocation.asset_id)
+        .join(Client, Client.id == Allocation.client_id)
+    )
+    if client_id is not None:
+        query = query.where(Allocation.client_id == client_id)
+    if asset_id is not None:
+        query = query.where(Allocation.asset_id == asset_id)
+    return query
+
+def movement_rows_query(
+    client_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    type: Optional[MovementType] = None,
+):
+    """Movimentações já com o nome do cliente, em uma única query"""
+    query = (
+        select(
+            Movement.id,
+            Movement.client_id,
+            Movement.type,
+            Movement.amount,
+            Movement.date,
+            Movement.note,
+            Movement.created_at,
+            Client.name.label("client_name"),
+        )
+        .join(Client, Client.id == Movement.client_id)
+    )
+    
+    if client_id:
+        query = query.where(Movement.client_id == client_id)
+    
+    if start_date:
+        query = query.where(Movement.date >= start_date)
+    
+    if end_date:
+        query = query.where(Movement.date <= end_date)
+    
+    if type:
+        query = query.where(Movement.type == type)
+    
+    return query
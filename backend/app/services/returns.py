@@ -0,0 +1,267 @@
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.asset import Allocation
+from app.models.movement import Movement, MovementType
+from app.models.price import Price
+from app.services.cache import VersionedCache
+
+# Chave composta (id * DAY_SPAN + dia) para buscas binárias por (cliente|ativo, data)
+DAY_SPAN = 10 ** 6
+EXPANSION_CHUNK = 2_000_000
+XIRR_MAX_ITERATIONS = 100
+XIRR_TOLERANCE = 1e-10
+
+# Resultados por (cliente, janela); invalidados ao gravar movimentos, alocações ou preços
+returns_cache = VersionedCache(["movements", "allocations", "prices"], maxsize=256, name="portfolio_returns")
+
+def _day(value) -> int:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+def _segment_starts(keys: np.ndarray) -> np.ndarray:
+    """Índices onde começa cada grupo em um array ordenado"""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+def _lookup_last(keys: np.ndarray, owners: np.ndarray, query_keys: np.ndarray, query_owners: np.ndarray):
+    """Para cada consulta, posição da última chave <= consulta do mesmo dono (ou -1)"""
+    if len(keys) == 0:
+        return np.full(len(query_keys), -1, dtype=np.int64)
+    idx = np.searchsorted(keys, query_keys, side="right") - 1
+    safe = np.clip(idx, 0, len(keys) - 1)
+    return np.where((idx >= 0) & (owners[safe] == query_owners), idx, -1)
+
+def _unrealized_pnl(point_client, point_day, lot_client, lot_asset, lot_qty, lot_price, lot_day, px_keys, px_asset, px_close):
+    """P&L não realizado de cada ponto (cliente, dia) sobre os lotes comprados até o dia"""
+    total = np.zeros(len(point_client))
+    if len(lot_client) == 0 or len(point_client) == 0:
+        return total
+    
+    lo = np.searchsorted(lot_client, point_client, side="left")
+    hi = np.searchsorted(lot_client, point_client, side="right")
+    counts = hi - lo
+    
+    # Processa em blocos para manter a expansão pontos x lotes com memória limitada
+    bounds = np.cumsum(counts)
+    start = 0
+    while start < len(point_client):
+        base = bounds[start - 1] if start else 0
+        stop = int(np.searchsorted(bounds, base + EXPANSION_CHUNK, side="right"))
+        stop = max(stop, start + 1)
+        
+        chunk_counts = counts[start:stop]
+        point_idx = np.repeat(np.arange(start, stop), chunk_counts)
+        offsets = np.arange(len(point_idx)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        lot_idx = lo[point_idx] + offsets
+        
+        days = point_day[point_idx]
+        assets = lot_asset[lot_idx]
+        held = lot_day[lot_idx] <= days
+        
+        prices = lot_price[lot_idx]
+        if len(px_keys):
+            px = _lookup_last(px_keys, px_asset, assets * DAY_SPAN + days, assets)
+            prices = np.where(px >= 0, px_close[np.maximum(px, 0)], prices)
+        contribution = np.where(held, lot_qty[lot_idx] * (prices - lot_price[lot_idx]), 0.0)
+        total += np.bincount(point_idx, weights=contribution, minlength=len(point_client))[:len(point_client)]
+        start = stop
+    return total
+
+def _xirr(cash_flows, years, index, n_groups) -> np.ndarray:
+    """Newton-Raphson vetorizado: resolve a TIR de todos os grupos ao mesmo tempo"""
+    rate = np.full(n_groups, 0.1)
+    active = np.ones(n_groups, dtype=bool)
+    for _ in range(XIRR_MAX_ITERATIONS):
+        growth = 1.0 + rate[index]
+        discount = growth ** -years
+        value = np.bincount(index, weights=cash_flows * discount, minlength=n_groups)
+        derivative = np.bincount(index, weights=-years * cash_flows * discount / growth, minlength=n_groups)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(active & (derivative != 0), value / derivative, 0.0)
+        rate = np.maximum(rate - step, -0.9999)
+        active &= np.abs(step) > XIRR_TOLERANCE
+        if not active.any():
+            break
+    
+    # Sem troca de sinal ou sem convergência não existe TIR
+    has_inflow = np.bincount(index, weights=(cash_flows > 0), minlength=n_groups) > 0
+    has_outflow = np.bincount(index, weights=(cash_flows < 0), minlength=n_groups) > 0
+    scale = np.bincount(index, weights=np.abs(cash_flows), minlength=n_groups)
+    residual = np.abs(np.bincount(index, weights=cash_flows * (1.0 + rate[index]) ** -years, minlength=n_groups))
+    valid = has_inflow & has_outflow & ~active & (residual <= 1e-6 * np.maximum(scale, 1.0))
+    return np.where(valid, rate, np.nan)
+
+def compute_returns(
+    flow_client, flow_day, flow_amount,
+    lot_client, lot_asset, lot_qty, lot_price, lot_day,
+    px_asset, px_day, px_close,
+    start_day: int, end_day: int,
+) -> dict:
+    """TWR e XIRR de todos os clientes na janela (start_day, end_day].
+
+    Fluxos externos são depósitos (+) e retiradas (-) já somados por
+    (cliente, dia) e ordenados; lotes e preços vêm ordenados por cliente e
+    por (ativo, dia). O patrimônio de um cliente em um dia é o saldo líquido
+    de aportes mais o P&L não realizado dos lotes comprados até aquele dia.
+    """
+    as_int = lambda values: np.asarray(values, dtype=np.int64)
+    as_float = lambda values: np.asarray(values, dtype=np.float64)
+    flow_client, flow_day, flow_amount = as_int(flow_client), as_int(flow_day), as_float(flow_amount)
+    lot_client, lot_asset, lot_day = as_int(lot_client), as_int(lot_asset), as_int(lot_day)
+    lot_qty, lot_price = as_float(lot_qty), as_float(lot_price)
+    px_asset, px_day, px_close = as_int(px_asset), as_int(px_day), as_float(px_close)
+    
+    clients = np.unique(np.concatenate([flow_client, lot_client]))
+    n = len(clients)
+    
+    # Pontos de avaliação: início, cada dia com fluxo dentro da janela, fim
+    in_window = (flow_day > start_day) & (flow_day <= end_day)
+    point_client = np.concatenate([clients, flow_client[in_window], clients])
+    point_day = np.concatenate([np.full(n, start_day), flow_day[in_window], np.full(n, end_day)])
+    point_flow = np.concatenate([np.zeros(n), flow_amount[in_window], np.zeros(n)])
+    point_kind = np.concatenate([np.zeros(n), np.ones(in_window.sum()), np.full(n, 2)]).astype(np.int64)
+    order = np.lexsort((point_kind, point_day, point_client))
+    point_client, point_day, point_flow, point_kind = (
+        point_client[order], point_day[order], point_flow[order], point_kind[order]
+    )
+    
+    # Aportes líquidos acumulados por cliente até cada ponto
+    flow_keys = flow_client * DAY_SPAN + flow_day
+    cumulative = np.cumsum(flow_amount)
+    flow_starts = _segment_starts(flow_client)
+    client_base = np.repeat(
+        np.r_[0.0, cumulative][flow_starts],
+        np.diff(np.r_[flow_starts, len(flow_client)])
+    )
+    idx = _lookup_last(flow_keys, flow_client, point_client * DAY_SPAN + point_day, point_client)
+    net_deposits = np.where(idx >= 0, (cumulative - client_base)[np.maximum(idx, 0)] if len(cumulative) else 0.0, 0.0)
+    
+    px_keys = px_asset * DAY_SPAN + px_day
+    values = net_deposits + _unrealized_pnl(
+        point_client, point_day, lot_client, lot_asset, lot_qty, lot_price, lot_day, px_keys, px_asset, px_close
+    )
+    
+    # TWR: encadeia os retornos entre fluxos consecutivos
+    starts = _segment_starts(point_client)
+    previous = np.r_[0.0, values[:-1]]
+    before_flow = values - point_flow
+    first = np.zeros(len(values), dtype=bool)
+    first[starts] = True
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factors = np.where(~first & (previous > 0), before_flow / previous, 1.0)
+    twr = np.multiply.reduceat(factors, starts) - 1.0 if len(starts) else np.zeros(0)
+    
+    # XIRR: patrimônio inicial como aporte, fluxos do investidor e patrimônio final como resgate
+    group = np.repeat(np.arange(n), np.diff(np.r_[starts, len(point_client)]))
+    cash_flows = np.select(
+        [point_kind == 0, point_kind == 1],
+        [-values, -point_flow],
+        values,
+    )
+    years = (point_day - start_day) / 365.0
+    xirr = _xirr(cash_flows, years, group, n) if n else np.zeros(0)
+    
+    start_values = values[point_kind == 0]
+    end_values = values[point_kind == 2]
+    net_flow = np.bincount(group, weights=point_flow, minlength=n) if n else np.zeros(0)
+    
+    return {
+        "client_id": clients,
+        "start_value": start_values,
+        "end_value": end_values,
+        "net_flow": net_flow,
+        "twr": twr,
+        "xirr": xirr,
+    }
+
+async def client_returns(
+    session: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    client_id: Optional[int] = None,
+) -> list:
+    """Retornos por cliente na janela, com cache por (cliente, janela)"""
+    end_date = end_date or date.today()
+    cache_key = (client_id, start_date, end_date)
+    cached, versions = returns_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Fluxos externos já somados por (cliente, dia) no banco
+    day = func.date(Movement.date)
+    signed = case((Movement.type == MovementType.DEPOSIT, Movement.amount), else_=-Movement.amount)
+    flow_stmt = (
+        select(Movement.client_id, day, func.sum(signed))
+        .where(Movement.date < datetime.combine(date.fromordinal(end_date.toordinal() + 1), datetime.min.time()))
+        .group_by(Movement.client_id, day)
+        .order_by(Movement.client_id, day)
+    )
+    lot_stmt = (
+        select(Allocation.client_id, Allocation.asset_id, Allocation.quantity, Allocation.buy_price, Allocation.buy_date)
+        .order_by(Allocation.client_id)
+    )
+    if client_id is not None:
+        flow_stmt = flow_stmt.where(Movement.client_id == client_id)
+        lot_stmt = lot_stmt.where(Allocation.client_id == client_id)
+    
+    flows = (await session.execute(flow_stmt)).all()
+    lots = (await session.execute(lot_stmt)).all()
+    
+    asset_ids = sorted({lot.asset_id for lot in lots})
+    prices = []
+    if asset_ids:
+        price_stmt = (
+            select(Price.asset_id, Price.date, Price.close)
+            .where(Price.asset_id.in_(asset_ids), Price.date <= end_date)
+            .order_by(Price.asset_id, Price.date)
+        )
+        prices = (await session.execute(price_stmt)).all()
+    
+    flow_days = [_day(row[1]) for row in flows]
+    lot_days = [_day(lot.buy_date) for lot in lots]
+    if start_date is not None:
+        start_day = start_date.toordinal()
+    else:
+        # Desde o início: janela começa antes da primeira atividade
+        start_day = min(flow_days + lot_days + [end_date.toordinal()]) - 1
+    
+    result = compute_returns(
+        [row[0] for row in flows], flow_days, [row[2] for row in flows],
+        [lot.client_id for lot in lots], [lot.asset_id for lot in lots],
+        [lot.quantity for lot in lots], [lot.buy_price for lot in lots], lot_days,
+        [row[0] for row in prices], [_day(row[1]) for row in prices], [row[2] for row in prices],
+        start_day, end_date.toordinal(),
+    )
+    
+    returns = [
+        {
+            "client_id": cid,
+            "start_date": start_date,
+            "end_date": end_date,
+            "start_value": start_value,
+            "end_value": end_value,
+            "net_flow": net_flow,
+            "twr": None if np.isnan(twr) else twr,
+            "xirr": None if np.isnan(xirr) else xirr,
+        }
+        for cid, start_value, end_value, net_flow, twr, xirr in zip(
+            result["client_id"].tolist(),
+            result["start_value"].tolist(),
+            result["end_value"].tolist(),
+            result["net_flow"].tolist(),
+            result["twr"].tolist(),
+            result["xirr"].tolist(),
+        )
+    ]
+    returns_cache.set(cache_key, returns, versions)
+    return returns
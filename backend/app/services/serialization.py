@@ -0,0 +1,30 @@
+from decimal import Decimal
+from typing import Any, List
+
+import orjson
+from fastapi import Response
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    # OPT_UTC_Z: datas em UTC saem com "Z", como no Pydantic
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(Response):
+    """Resposta JSON codificada com orjson, sem a segunda validação contra o response_model
+
+    Para listas montadas direto das linhas do SQL: o response_model da rota continua
+    documentando o formato, mas o FastAPI não revalida nem reencoda um Response pronto.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def rows_as_dicts(result) -> List[dict]:
+    """Linhas de um Result (select de colunas rotuladas) como dicts prontos para o orjson"""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -0,0 +1,116 @@
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.asset import Asset
+from app.models.client import Client
+from app.models.position import Position
+from app.services.price_history import load_latest_prices
+
+def compute_valuation(client_ids, asset_ids, quantities, costs, price_asset_ids, price_values) -> dict:
+    """Marcação a mercado vetorizada de todas as posições (cliente, ativo).
+
+    Recebe arrays paralelos das posições e dos últimos preços e devolve
+    arrays com valor de mercado, P&L e pesos por posição, além dos totais
+    agregados por cliente e por ativo. Ativos sem preço são marcados pelo
+    custo médio.
+    """
+    client_ids = np.asarray(client_ids, dtype=np.int64)
+    asset_ids = np.asarray(asset_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    costs = np.asarray(costs, dtype=np.float64)
+    price_asset_ids = np.asarray(price_asset_ids, dtype=np.int64)
+    price_values = np.asarray(price_values, dtype=np.float64)
+    
+    average_cost = np.divide(costs, quantities, out=np.zeros_like(costs), where=quantities != 0)
+    
+    # Casar cada posição com o preço do seu ativo via busca binária
+    if len(price_asset_ids):
+        order = np.argsort(price_asset_ids)
+        sorted_ids = price_asset_ids[order]
+        sorted_prices = price_values[order]
+        pos = np.clip(np.searchsorted(sorted_ids, asset_ids), 0, len(sorted_ids) - 1)
+        priced = sorted_ids[pos] == asset_ids
+        prices = np.where(priced, sorted_prices[pos], average_cost)
+    else:
+        priced = np.zeros(len(asset_ids), dtype=bool)
+        prices = average_cost
+    
+    market_values = quantities * prices
+    pnl = market_values - costs
+    
+    clients, client_index = np.unique(client_ids, return_inverse=True)
+    client_market_values = np.bincount(client_index, weights=market_values, minlength=len(clients))
+    client_costs = np.bincount(client_index, weights=costs, minlength=len(clients))
+    position_totals = client_market_values[client_index]
+    weights = np.divide(market_values, position_totals, out=np.zeros_like(market_values), where=position_totals != 0)
+    
+    assets, asset_index = np.unique(asset_ids, return_inverse=True)
+    asset_quantities = np.bincount(asset_index, weights=quantities, minlength=len(assets))
+    asset_market_values = np.bincount(asset_index, weights=market_values, minlength=len(assets))
+    total_market_value = market_values.sum()
+    asset_weights = asset_market_values / total_market_value if total_market_value else np.zeros_like(asset_market_values)
+    
+    return {
+        "positions": {
+            "client_id": client_ids,
+            "asset_id": asset_ids,
+            "quantity": quantities,
+            "average_cost": average_cost,
+            "price": prices,
+            "priced": priced,
+            "cost": costs,
+            "market_value": market_values,
+            "unrealized_pnl": pnl,
+            "weight": weights,
+        },
+        "clients": {
+            "client_id": clients,
+            "cost": client_costs,
+            "market_value": client_market_values,
+            "unrealized_pnl": client_market_values - client_costs,
+        },
+        "assets": {
+            "asset_id": assets,
+            "quantity": asset_quantities,
+            "market_value": asset_market_values,
+            "weight": asset_weights,
+        },
+        "cost": float(costs.sum()),
+        "market_value": float(total_market_value),
+    }
+
+async def value_portfolios(session: AsyncSession, client_id: Optional[int] = None) -> dict:
+    """Carrega posições e últimos preços e aplica compute_valuation"""
+    # Posições já consolidadas por (cliente, ativo): uma linha por ativo, sem reagregar os lotes
+    stmt = (
+        select(Position.client_id, Position.asset_id, Position.quantity, Position.total_invested)
+        .order_by(Position.client_id, Position.asset_id)
+    )
+    if client_id is not None:
+        stmt = stmt.where(Position.client_id == client_id)
+    result = await session.execute(stmt)
+    rows = result.all()
+    
+    columns = list(zip(*rows)) if rows else [(), (), (), ()]
+    asset_ids = sorted(set(columns[1]))
+    
+    prices = await load_latest_prices(session, asset_ids if client_id is not None else None)
+    price_columns = list(zip(*prices)) if prices else [(), (), ()]
+    
+    valuation = compute_valuation(*columns, price_columns[0], price_columns[2])
+    valuation["as_of"] = max(price_columns[1]) if prices else None
+    
+    # Nomes só para os ids presentes no resultado
+    ticker_result = await session.execute(select(Asset.id, Asset.ticker).where(Asset.id.in_(asset_ids)))
+    valuation["tickers"] = dict(ticker_result.all())
+    
+    client_stmt = select(Client.id, Client.name)
+    if client_id is not None:
+        client_stmt = client_stmt.where(Client.id == client_id)
+    client_result = await session.execute(client_stmt)
+    valuation["client_names"] = dict(client_result.all())
+    
+    return valuation
@@ -1,47 +1,187 @@
 import yfinance as yf
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import math
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from app.database import dialect_insert
 from app.models.asset import Asset
 from app.schemas.asset import AssetCreate
+from app.services.market_data import MarketDataProvider, get_market_data
 
-async def search_asset(ticker: str, db: AsyncSession):
-    try:
-        print(f"🔍 Buscando ativo: {ticker}")
-        
-        # Buscar no Yahoo Finance
-        stock = yf.Ticker(ticker)
-        info = stock.info
+class YahooFinanceProvider(MarketDataProvider):
+    name = "yahoo"
+
+    def fetch_asset_info(self, ticker: str) -> Optional[dict]:
+        info = yf.Ticker(ticker).info or {}
+        name = info.get('longName') or info.get('shortName')
         
-        print(f"📊 Informações recebidas: {list(info.keys())}")
+        # Tickers inválidos voltam sem nome
+        if not name:
+            return None
         
-        # Extrair dados importantes
-        asset_data = AssetCreate(
-            ticker=ticker.upper(),
-            name=info.get('longName', info.get('shortName', ticker.upper())),
-            exchange=info.get('exchange', ''),
-            currency=info.get('currency', 'BRL')
+        return {
+            "ticker": ticker.upper(),
+            "name": name,
+            "exchange": info.get('exchange', ''),
+            "currency": info.get('currency', 'BRL'),
+        }
+
+    def fetch_price_history(self, tickers: List[str], start: date) -> Dict[str, List[dict]]:
+        # Uma única chamada ao yf.download para o lote inteiro
+        data = yf.download(
+            tickers,
+            start=start.isoformat(),
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
         )
+        history = {}
+        if data is None or data.empty:
+            return history
         
-        print(f"✅ Dados do ativo: {asset_data}")
+        for ticker in tickers:
+            if data.columns.nlevels > 1:
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            
+            bars = []
+            for index, row in frame.dropna(subset=["Close"]).iterrows():
+                volume = row.get("Volume")
+                bars.append({
+                    "date": index.date(),
+                    "open": float(row["Open"]),
+                    "high": float(row["High"]),
+                    "low": float(row["Low"]),
+                    "close": float(row["Close"]),
+                    "volume": None if volume is None or math.isnan(volume) else int(volume),
+                })
+            if bars:
+                history[ticker] = bars
+        return history
+
+    def fetch_quotes(self, tickers: List[str]) -> Dict[str, dict]:
+        # Último candle de 1 minuto do pregão, o lote inteiro em um único yf.download
+        data = yf.download(
+            tickers,
+            period="1d",
+            interval="1m",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+        )
+        quotes = {}
+        if data is None or data.empty:
+            return quotes
         
-        # Verificar se já existe
-        stmt = select(Asset).where(Asset.ticker == ticker.upper())
+        for ticker in tickers:
+            if data.columns.nlevels > 1:
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                closes = data[ticker]["Close"].dropna()
+            else:
+                closes = data["Close"].dropna()
+            if closes.empty:
+                continue
+            quotes[ticker] = {
+                "price": float(closes.iloc[-1]),
+                "timestamp": closes.index[-1].to_pydatetime(),
+            }
+        return quotes
+
+async def search_asset(ticker: str, db: AsyncSession) -> Tuple[Asset, bool]:
+    """(ativo, criado): busca no banco e, se não existir, no provedor, cadastrando o ativo"""
+    ticker = ticker.upper()
+    print(f"🔍 Buscando ativo: {ticker}")
+    
+    # Verificar no banco antes de consultar o provedor
+    stmt = select(Asset).where(Asset.ticker == ticker)
+    result = await db.execute(stmt)
+    existing_asset = result.scalars().first()
+    
+    if existing_asset:
+        print(f"📦 Ativo já existe: {existing_asset.ticker}")
+        return existing_asset, False
+    
+    try:
+        info = await get_market_data().get_asset_info(ticker)
+    except Exception as e:
+        print(f"❌ Erro ao buscar ativo {ticker}: {str(e)}")
+        raise Exception(f"Erro ao buscar ativo {ticker}: {str(e)}")
+    
+    if info is None:
+        raise Exception(f"Ativo {ticker} não encontrado")
+    
+    # Criar novo asset
+    new_asset = Asset(**AssetCreate(**info).dict())
+    db.add(new_asset)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Outra requisição cadastrou o mesmo ticker nesse meio tempo
+        await db.rollback()
         result = await db.execute(stmt)
-        existing_asset = result.scalars().first()
-        
-        if existing_asset:
-            print(f"📦 Ativo já existe: {existing_asset.ticker}")
-            return existing_asset
-        
-        # Criar novo asset
-        new_asset = Asset(**asset_data.dict())
-        db.add(new_asset)
+        return result.scalars().first(), False
+    await db.refresh(new_asset)
+    
+    print(f"🎉 Novo ativo criado: {new_asset.ticker} - {new_asset.name}")
+    return new_asset, True
+
+async def search_assets(tickers: List[str], db: AsyncSession, concurrency: int = 16) -> List[dict]:
+    """Resolve vários tickers de uma vez: um SELECT ... IN, consultas concorrentes
+    ao provedor só para os ausentes e um único INSERT multi-linha"""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    
+    stmt = select(Asset).where(Asset.ticker.in_(tickers))
+    result = await db.execute(stmt)
+    existing = {asset.ticker: asset for asset in result.scalars()}
+    missing = [ticker for ticker in tickers if ticker not in existing]
+    
+    # Consultar o provedor com concorrência limitada
+    semaphore = asyncio.Semaphore(concurrency)
+    market_data = get_market_data()
+    
+    async def lookup(ticker: str):
+        async with semaphore:
+            try:
+                info = await market_data.get_asset_info(ticker)
+            except Exception as e:
+                return ticker, None, str(e)
+        if info is None:
+            return ticker, None, f"Ativo {ticker} não encontrado"
+        return ticker, info, None
+    
+    lookups = await asyncio.gather(*(lookup(ticker) for ticker in missing))
+    errors = {ticker: error for ticker, info, error in lookups if error}
+    new_rows = [AssetCreate(**info).dict() for ticker, info, error in lookups if info]
+    
+    created = set()
+    if new_rows:
+        insert_stmt = (
+            dialect_insert(db, Asset)
+            .values(new_rows)
+            .on_conflict_do_nothing(index_elements=[Asset.ticker])
+            .returning(Asset.ticker)
+        )
+        insert_result = await db.execute(insert_stmt)
+        created = set(insert_result.scalars())
         await db.commit()
-        await db.refresh(new_asset)
-        
-        print(f"🎉 Novo ativo criado: {new_asset.ticker} - {new_asset.name}")
-        return new_asset
         
-    except Exception as e:
-        print(f"❌ Erro ao buscar ativo {ticker}: {str(e)}")
-        raise Exception(f"Erro ao buscar ativo {ticker}: {str(e)}")
\ No newline at end of file
+        result = await db.execute(select(Asset).where(Asset.ticker.in_([row["ticker"] for row in new_rows])))
+        existing.update({asset.ticker: asset for asset in result.scalars()})
+    
+    results = []
+    for ticker in tickers:
+        if ticker in errors:
+            results.append({"ticker": ticker, "status": "failed", "error": errors[ticker]})
+        else:
+            status = "created" if ticker in created else "found"
+            results.append({"ticker": ticker, "status": status, "asset": existing[ticker]})
+    return results
@@ -0,0 +1,65 @@
+"""Compara dois resultados de benchmarks.run e aponta regressões
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Sai com código 1 se algum endpoint piorou além da tolerância em p95 ou em queries por requisição.
+"""
+import argparse
+import json
+import sys
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+def compare(baseline: dict, current: dict, metric: str, tolerance: float, min_delta_ms: float):
+    rows = []
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            rows.append((name, None, new[metric], None, new["queries_per_request"], "novo"))
+            continue
+
+        change = (new[metric] - old[metric]) / old[metric] if old[metric] else 0.0
+        slower = change > tolerance and new[metric] - old[metric] > min_delta_ms
+        more_queries = (new["queries_per_request"] or 0) > (old["queries_per_request"] or 0)
+        status = "ok"
+        if slower or more_queries:
+            status = "REGRESSÃO"
+            regressions.append(name)
+        elif change < -tolerance:
+            status = "melhorou"
+        rows.append((name, old[metric], new[metric], change, new["queries_per_request"], status))
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara dois arquivos de resultado dos benchmarks")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignora pioras menores que isso (ruído)")
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+    if baseline.get("dataset") != current.get("dataset"):
+        print(f"Atenção: massas diferentes ({baseline.get('dataset')} x {current.get('dataset')})")
+
+    rows, regressions = compare(baseline, current, args.metric, args.tolerance, args.min_delta_ms)
+    print(f"{baseline['commit']} -> {current['commit']} ({args.metric})")
+    for name, old, new, change, queries, status in rows:
+        old_text = f"{old:9.2f}" if old is not None else " " * 9
+        change_text = f"{change:+7.1%}" if change is not None else " " * 7
+        print(f"{name:32s} {old_text} -> {new:9.2f} ms {change_text}  queries {queries}  {status}")
+
+    if regressions:
+        print(f"{len(regressions)} endpoint(s) com regressão: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Massa de dados para os benchmarks, gerada pelo generate_data.py"""
+import argparse
+
+from sqlalchemy import func, insert, select
+
+from app.database import AsyncSessionLocal
+from app.models.client import Client
+from app.models.movement import Movement
+from app.models.user import User
+from app.auth.security import get_password_hash
+from generate_data import generate
+
+# Volume com --scale 1.0
+FULL_DATASET = {
+    "clients": 100_000,
+    "assets": 2_000,
+    "allocations": 500_000,
+    "movements": 1_000_000,
+    "price_days": 250,
+}
+
+def dataset_size(scale: float) -> dict:
+    sizes = {table: max(1, int(rows * scale)) for table, rows in FULL_DATASET.items()}
+    sizes["price_days"] = FULL_DATASET["price_days"]
+    return sizes
+
+async def is_seeded(sizes: dict) -> bool:
+    async with AsyncSessionLocal() as session:
+        clients = await session.scalar(select(func.count(Client.id)))
+        movements = await session.scalar(select(func.count(Movement.id)))
+    return clients >= sizes["clients"] and movements >= sizes["movements"]
+
+async def seed(sizes: dict, rng_seed: int = 42, admin_password: str = "admin123") -> float:
+    async with AsyncSessionLocal() as session:
+        admin = await session.scalar(select(User.id).where(User.username == "admin"))
+        if admin is None:
+            await session.execute(insert(User), [{
+                "username": "admin",
+                "full_name": "Administrator",
+                "email": "admin@invest.com",
+                "password": get_password_hash(admin_password),
+                "is_active": True,
+            }])
+            await session.commit()
+
+    args = argparse.Namespace(
+        clients=sizes["clients"],
+        assets=sizes["assets"],
+        allocations=sizes["allocations"],
+        movements=sizes["movements"],
+        price_days=sizes["price_days"],
+        years=6,
+        seed=rng_seed,
+        batch_size=50_000,
+        workers=4,
+    )
+    result = await generate(args)
+    return sum(result["seconds"].values())
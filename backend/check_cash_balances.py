@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import sys
+from app.database import AsyncSessionLocal, engine
+from app.models.client import Client
+from app.models.movement import Movement
+from app.models.cash_balance import CashBalance
+from app.services.cash_balances import check_cash_balances, rebuild_cash_balances
+
+async def main(client_id=None, fix=False, limit=100):
+    target = f"do cliente {client_id}" if client_id is not None else "de todos os clientes"
+    print(f"🔍 Conferindo saldos em caixa {target} contra as movimentações...")
+    async with AsyncSessionLocal() as session:
+        mismatches = await check_cash_balances(session, client_id=client_id, limit=limit)
+        for mismatch in mismatches:
+            print(f"   cliente {mismatch['client_id']} dia {mismatch['day']}: "
+                  f"gravado {mismatch['stored_balance']} esperado {mismatch['expected_balance']}")
+        
+        if mismatches and fix:
+            print("🔄 Recalculando saldos...")
+            rows = await rebuild_cash_balances(session, client_id=client_id)
+            print(f"✅ {rows} saldos diários gravados")
+    
+    await engine.dispose()
+    if not mismatches:
+        print("✅ Saldos consistentes")
+        return 0
+    found = f"{len(mismatches)}{'+' if len(mismatches) == limit else ''}"
+    if fix:
+        print(f"🔧 {found} divergências corrigidas")
+        return 0
+    print(f"❌ {found} divergências encontradas")
+    return 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere os saldos em caixa (cash_balances) contra as movimentações")
+    parser.add_argument("client_id", type=int, nargs="?", help="Confere apenas este cliente")
+    parser.add_argument("--fix", action="store_true", help="Recalcula os saldos se houver divergência")
+    parser.add_argument("--limit", type=int, default=100, help="Máximo de divergências listadas")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.client_id, fix=args.fix, limit=args.limit)))
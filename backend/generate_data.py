@@ -0,0 +1,336 @@
+"""Gerador de massa sintética em volume de produção
+
+Uso (a partir de backend/, com o schema já criado via `alembic upgrade head`):
+
+    python generate_data.py --clients 1000000 --movements 10000000 --allocations 5000000
+    python generate_data.py --clients 1000 --movements 20000 --seed 7 --database-url sqlite+aiosqlite:///./dev.db
+
+A mesma semente gera a mesma massa, independente do número de workers. As linhas saem em lotes
+de --batch-size por uma fila limitada (memória constante) e são gravadas por --workers conexões
+em paralelo: COPY no PostgreSQL (asyncpg), INSERT multi-linha nos demais bancos.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Tickers reais primeiro: os mais populares nas carteiras
+BR_TICKERS = [
+    ("PETR4", "Petrobras PN"), ("VALE3", "Vale ON"), ("ITUB4", "Itaú Unibanco PN"), ("BBDC4", "Bradesco PN"),
+    ("BBAS3", "Banco do Brasil ON"), ("ABEV3", "Ambev ON"), ("WEGE3", "WEG ON"), ("B3SA3", "B3 ON"),
+    ("PETR3", "Petrobras ON"), ("ITSA4", "Itaúsa PN"), ("RENT3", "Localiza ON"), ("SUZB3", "Suzano ON"),
+    ("BPAC11", "BTG Pactual Unit"), ("PRIO3", "PetroRio ON"), ("ELET3", "Eletrobras ON"), ("RDOR3", "Rede D'Or ON"),
+    ("GGBR4", "Gerdau PN"), ("JBSS3", "JBS ON"), ("RADL3", "Raia Drogasil ON"), ("EQTL3", "Equatorial ON"),
+    ("LREN3", "Lojas Renner ON"), ("VIVT3", "Telefônica Brasil ON"), ("CSAN3", "Cosan ON"), ("SBSP3", "Sabesp ON"),
+    ("TAEE11", "Taesa Unit"), ("EGIE3", "Engie Brasil ON"), ("CMIG4", "Cemig PN"), ("HAPV3", "Hapvida ON"),
+    ("MGLU3", "Magazine Luiza ON"), ("TOTS3", "Totvs ON"), ("KLBN11", "Klabin Unit"), ("CPLE6", "Copel PNB"),
+    ("HGLG11", "CSHG Logística FII"), ("KNRI11", "Kinea Renda Imobiliária FII"), ("MXRF11", "Maxi Renda FII"),
+    ("XPML11", "XP Malls FII"), ("VISC11", "Vinci Shopping Centers FII"), ("BOVA11", "iShares Ibovespa ETF"),
+    ("IVVB11", "iShares S&P 500 ETF"), ("SMAL11", "iShares Small Cap ETF"),
+]
+US_TICKERS = [
+    ("AAPL", "Apple Inc.", "NMS"), ("MSFT", "Microsoft", "NMS"), ("AMZN", "Amazon.com", "NMS"),
+    ("NVDA", "NVIDIA", "NMS"), ("GOOGL", "Alphabet A", "NMS"), ("META", "Meta Platforms", "NMS"),
+    ("TSLA", "Tesla", "NMS"), ("BRK-B", "Berkshire Hathaway B", "NYQ"), ("JPM", "JPMorgan Chase", "NYQ"),
+    ("V", "Visa", "NYQ"), ("JNJ", "Johnson & Johnson", "NYQ"), ("WMT", "Walmart", "NYQ"),
+    ("PG", "Procter & Gamble", "NYQ"), ("XOM", "Exxon Mobil", "NYQ"), ("KO", "Coca-Cola", "NYQ"),
+    ("DIS", "Walt Disney", "NYQ"), ("NFLX", "Netflix", "NMS"), ("AMD", "Advanced Micro Devices", "NMS"),
+    ("INTC", "Intel", "NMS"), ("CSCO", "Cisco", "NMS"), ("PEP", "PepsiCo", "NMS"), ("COST", "Costco", "NMS"),
+    ("SPY", "SPDR S&P 500 ETF", "PCX"), ("QQQ", "Invesco QQQ ETF", "NMS"), ("VOO", "Vanguard S&P 500 ETF", "PCX"),
+]
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Juliana", "Lucas", "Mariana", "Mateus", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago",
+    "Beatriz", "Caio", "Fernanda", "Gustavo", "Larissa", "Leonardo", "Camila", "Pedro", "Renata", "Vitor",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+]
+
+CLIENT_COLUMNS = ["name", "email", "is_active"]
+ASSET_COLUMNS = ["ticker", "name", "exchange", "currency"]
+PRICE_COLUMNS = ["asset_id", "date", "open", "high", "low", "close", "volume"]
+ALLOCATION_COLUMNS = ["client_id", "asset_id", "quantity", "buy_price", "buy_date"]
+MOVEMENT_COLUMNS = ["client_id", "type", "amount", "date", "note"]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera massa sintética em volume para o InvestCase")
+    parser.add_argument("--database-url", help="Banco de destino (padrão: DATABASE_URL)")
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--assets", type=int, default=500, help="Ativos; além dos tickers reais, gera tickers sintéticos")
+    parser.add_argument("--allocations", type=int, default=500_000)
+    parser.add_argument("--movements", type=int, default=1_000_000)
+    parser.add_argument("--price-days", type=int, default=500, help="Pregões de histórico de preço por ativo")
+    parser.add_argument("--years", type=float, default=6, help="Anos de histórico de movimentações e alocações")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4, help="Conexões gravando em paralelo (1 no SQLite)")
+    return parser.parse_args(argv)
+
+def synthetic_assets(count: int):
+    """Tickers reais da B3 e dos EUA seguidos de tickers sintéticos determinísticos (70% B3)"""
+    assets = [(f"{ticker}.SA", name, "SAO", "BRL") for ticker, name in BR_TICKERS]
+    assets += [(ticker, name, exchange, "USD") for ticker, name, exchange in US_TICKERS]
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    index = 0
+    while len(assets) < count:
+        code = "".join(letters[(index // 26 ** power) % 26] for power in (3, 2, 1, 0))
+        if index % 10 < 7:
+            assets.append((f"{code}{3 + index % 2}.SA", f"Companhia {code}", "SAO", "BRL"))
+        else:
+            assets.append((f"{code}X", f"{code.title()} Corp.", "NYQ", "USD"))
+        index += 1
+    return assets[:count]
+
+def skewed_weights(rng, count: int, shape: float) -> np.ndarray:
+    """CDF de pesos com cauda longa (Pareto): poucos clientes/ativos concentram a maior parte das linhas"""
+    weights = rng.pareto(shape, count) + 1.0
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def popularity_cdf(count: int, exponent: float = 1.1) -> np.ndarray:
+    """Zipf pela posição: os primeiros tickers da lista são os mais comprados"""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def pick(rng, ids: np.ndarray, cdf: np.ndarray, size: int) -> np.ndarray:
+    return ids[np.minimum(np.searchsorted(cdf, rng.random(size)), len(ids) - 1)]
+
+def history_dates(rng, start: datetime, end: datetime, size: int) -> list:
+    """Datas no intervalo, mais densas nos anos recentes (a base de clientes cresce)"""
+    span = (end - start).total_seconds()
+    offsets = (rng.power(1.6, size) * span).astype("timedelta64[s]")
+    return (np.datetime64(start, "s") + offsets).astype("datetime64[us]").tolist()
+
+def client_batches(args, first_index: int, run_tag: str):
+    for batch_index, offset in enumerate(range(0, args.clients, args.batch_size)):
+        rng = np.random.default_rng([args.seed, 1, batch_index])
+        size = min(args.batch_size, args.clients - offset)
+        first = rng.integers(0, len(FIRST_NAMES), size).tolist()
+        last = rng.integers(0, len(LAST_NAMES), (size, 2)).tolist()
+        active = (rng.random(size) < 0.92).tolist()
+        rows = []
+        for i in range(size):
+            number = first_index + offset + i
+            name = f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i][0]]} {LAST_NAMES[last[i][1]]}"
+            email = f"{FIRST_NAMES[first[i]].lower()}.{number}.{run_tag}@cliente.invest"
+            rows.append((name, email, active[i]))
+        yield rows
+
+def price_batches(args, asset_ids: np.ndarray, days: list):
+    per_batch = max(1, args.batch_size // max(1, len(days)))
+    day_count = len(days)
+    for batch_index, offset in enumerate(range(0, len(asset_ids), per_batch)):
+        rng = np.random.default_rng([args.seed, 3, batch_index])
+        ids = asset_ids[offset:offset + per_batch]
+        # Passeio aleatório geométrico por ativo
+        start = rng.uniform(5, 300, (len(ids), 1))
+        returns = rng.normal(0.0003, 0.018, (len(ids), day_count))
+        close = start * np.exp(np.cumsum(returns, axis=1))
+        spread = np.abs(rng.normal(0, 0.01, (len(ids), day_count)))
+        volume = rng.lognormal(13, 1.0, (len(ids), day_count)).astype(np.int64)
+        rows = []
+        for row, asset_id in enumerate(ids.tolist()):
+            closes = close[row].round(2).tolist()
+            highs = (close[row] * (1 + spread[row])).round(2).tolist()
+            lows = (close[row] * (1 - spread[row])).round(2).tolist()
+            opens = np.concatenate(([start[row, 0]], close[row, :-1])).round(2).tolist()
+            volumes = volume[row].tolist()
+            rows.extend(zip([asset_id] * day_count, days, opens, highs, lows, closes, volumes))
+        yield rows
+
+def allocation_batches(args, client_ids, client_cdf, asset_ids, asset_cdf, start: datetime, end: datetime):
+    for batch_index, offset in enumerate(range(0, args.allocations, args.batch_size)):
+        rng = np.random.default_rng([args.seed, 4, batch_index])
+        size = min(args.batch_size, args.allocations - offset)
+        clients = pick(rng, client_ids, client_cdf, size).tolist()
+        assets = pick(rng, asset_ids, asset_cdf, size).tolist()
+        quantity = np.ceil(rng.lognormal(4, 1.3, size)).tolist()
+        buy_price = rng.lognormal(3.3, 0.9, size).round(2).tolist()
+        yield list(zip(clients, assets, quantity, buy_price, history_dates(rng, start, end, size)))
+
+def movement_batches(args, client_ids, client_cdf, start: datetime, end: datetime):
+    for batch_index, offset in enumerate(range(0, args.movements, args.batch_size)):
+        rng = np.random.default_rng([args.seed, 5, batch_index])
+        size = min(args.batch_size, args.movements - offset)
+        clients = pick(rng, client_ids, client_cdf, size).tolist()
+        deposit = rng.random(size) < 0.68
+        types = np.where(deposit, "DEPOSIT", "WITHDRAWAL").tolist()
+        # Depósitos recorrentes pequenos e alguns aportes grandes; retiradas um pouco maiores
+        amount = np.where(deposit, rng.lognormal(7.2, 1.3, size), rng.lognormal(7.6, 1.1, size)).round(2).tolist()
+        notes = [None] * size
+        yield list(zip(clients, types, amount, history_dates(rng, start, end, size), notes))
+
+def business_days(end: date, count: int) -> list:
+    days = np.busday_offset(np.datetime64(end, "D"), -np.arange(count)[::-1], roll="backward")
+    return days.astype("datetime64[D]").tolist()
+
+async def write_batches(engine, model, columns, batches, workers: int) -> int:
+    """Grava os lotes com `workers` conexões; a fila limitada segura a geração quando o banco atrasa"""
+    from sqlalchemy import insert
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+    written = 0
+
+    async def worker():
+        nonlocal written
+        async with engine.connect() as connection:
+            raw = await connection.get_raw_connection() if connection.dialect.driver == "asyncpg" else None
+            while True:
+                rows = await queue.get()
+                if rows is None:
+                    return
+                if raw is not None:
+                    await raw.driver_connection.copy_records_to_table(
+                        model.__tablename__, records=rows, columns=columns
+                    )
+                else:
+                    await connection.execute(insert(model), [dict(zip(columns, row)) for row in rows])
+                    await connection.commit()
+                written += len(rows)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+
+    async def put(item):
+        # Um worker que falha para de consumir: com a fila cheia o put esperaria para sempre
+        put_task = asyncio.create_task(queue.put(item))
+        done, _ = await asyncio.wait([put_task, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                put_task.cancel()
+                raise task.exception()
+        if put_task not in done:
+            # Um worker terminou sem erro antes do fim (não deveria): espera o put normalmente
+            await put_task
+
+    try:
+        for rows in batches:
+            await put(rows)
+            # Deixa os workers consumirem enquanto o próximo lote é gerado
+            await asyncio.sleep(0)
+        for _ in tasks:
+            await put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return written
+
+async def load_ids(engine, column) -> np.ndarray:
+    from sqlalchemy import select
+
+    async with engine.connect() as connection:
+        result = await connection.execute(select(column).order_by(column))
+        return np.fromiter((row[0] for row in result), dtype=np.int64)
+
+async def generate(args) -> dict:
+    from sqlalchemy import func, select, text
+    from sqlalchemy.dialects import postgresql, sqlite
+    from app.database import engine, AsyncSessionLocal
+    from app.services.positions import rebuild_positions
+    from app.services.cash_balances import rebuild_cash_balances
+    from app.models.client import Client
+    from app.models.asset import Asset, Allocation
+    from app.models.movement import Movement
+    from app.models.price import Price
+
+    workers = 1 if engine.dialect.name == "sqlite" else max(1, args.workers)
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=int(args.years * 365))
+    counts = {}
+    timings = {}
+
+    async with engine.connect() as connection:
+        existing_clients = await connection.scalar(select(func.count(Client.id)))
+    # Tag da execução: e-mails não colidem com os de uma geração anterior no mesmo banco
+    run_tag = f"{args.seed}x{existing_clients}"
+
+    started = time.perf_counter()
+    counts["clients"] = await write_batches(engine, Client, CLIENT_COLUMNS,
+                                            client_batches(args, existing_clients + 1, run_tag), workers)
+    timings["clients"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    assets = [dict(zip(ASSET_COLUMNS, row)) for row in synthetic_assets(args.assets)]
+    dialect_insert = sqlite.insert if engine.dialect.name == "sqlite" else postgresql.insert
+    async with engine.begin() as connection:
+        statement = dialect_insert(Asset).on_conflict_do_nothing(index_elements=["ticker"])
+        await connection.execute(statement, assets)
+        ticker_ids = dict((await connection.execute(select(Asset.ticker, Asset.id))).all())
+    # Mesma ordem da lista: a popularidade segue a posição do ticker
+    asset_ids = np.array([ticker_ids[asset["ticker"]] for asset in assets], dtype=np.int64)
+    counts["assets"] = len(asset_ids)
+    timings["assets"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    counts["prices"] = 0
+    if args.price_days:
+        async with engine.connect() as connection:
+            priced = set((await connection.execute(select(Price.asset_id).distinct())).scalars())
+        unpriced = np.array([asset_id for asset_id in asset_ids.tolist() if asset_id not in priced], dtype=np.int64)
+        days = business_days(date.today() - timedelta(days=1), args.price_days)
+        counts["prices"] = await write_batches(engine, Price, PRICE_COLUMNS, price_batches(args, unpriced, days), workers)
+    timings["prices"] = time.perf_counter() - started
+
+    client_ids = await load_ids(engine, Client.id)
+    rng = np.random.default_rng([args.seed, 2])
+    # Carteiras com cauda longa: ~20% dos clientes concentram a maior parte das alocações
+    portfolio_cdf = skewed_weights(rng, len(client_ids), shape=1.2)
+    activity_cdf = skewed_weights(rng, len(client_ids), shape=1.8)
+
+    started = time.perf_counter()
+    counts["allocations"] = await write_batches(
+        engine, Allocation, ALLOCATION_COLUMNS,
+        allocation_batches(args, client_ids, portfolio_cdf, asset_ids, popularity_cdf(len(asset_ids)), start, end),
+        workers,
+    )
+    timings["allocations"] = time.perf_counter() - started
+
+    # Posições consolidadas a partir dos lotes recém-gravados
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        counts["positions"] = await rebuild_positions(session)
+    timings["positions"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    counts["movements"] = await write_batches(
+        engine, Movement, MOVEMENT_COLUMNS, movement_batches(args, client_ids, activity_cdf, start, end), workers
+    )
+    timings["movements"] = time.perf_counter() - started
+
+    # Saldos diários acumulados a partir das movimentações recém-gravadas
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        counts["cash_balances"] = await rebuild_cash_balances(session)
+    timings["cash_balances"] = time.perf_counter() - started
+
+    # Estatísticas atualizadas para o planner (e para o total estimado da listagem de clientes)
+    async with engine.begin() as connection:
+        await connection.execute(text("ANALYZE"))
+    await engine.dispose()
+    return {"rows": counts, "seconds": timings}
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        # Precisa estar no ambiente antes de importar app.database
+        os.environ["DATABASE_URL"] = args.database_url
+
+    print("🔄 Gerando massa sintética...")
+    started = time.perf_counter()
+    result = asyncio.run(generate(args))
+    for table, rows in result["rows"].items():
+        seconds = result["seconds"].get(table, 0.0)
+        rate = rows / seconds if seconds else 0
+        print(f"  {table:12s} {rows:>12,d} linhas em {seconds:8.1f} s ({rate:,.0f}/s)")
+    print(f"✅ Concluído em {time.perf_counter() - started:.1f} s")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,55 @@
 import asyncio
+import os
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import create_async_engine
-from app.models.client import Client
-from app.models.asset import Asset, Allocation
-from app.models.movement import Movement
-from app.database import Base
-
-async def init_db():
-    """Cria todas as tabelas no banco de dados"""
-    
-    # URL do PostgreSQL
-    DATABASE_URL = "postgresql+asyncpg://invest:investpw@db:5432/investdb"
-    
-    print("🔄 Conectando ao banco de dados...")
-    engine = create_async_engine(DATABASE_URL, echo=True)
-    
-    print("🗑️  Deletando tabelas existentes...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-    
-    print("✨ Criando novas tabelas...")
+
+from app.models.user import User
+from app.auth.security import get_password_hash
+from app.database import DATABASE_URL
+
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+
+async def has_legacy_schema() -> bool:
+    """Banco criado pelo antigo create_all: tem tabelas, mas nenhum alembic_version
+
+    Nada é apagado: a migration 0001 adota as tabelas existentes e cria só as que faltam.
+    """
+    engine = create_async_engine(DATABASE_URL)
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    await engine.dispose()
+    return bool(tables) and "alembic_version" not in tables
+
+async def ensure_admin():
+    engine = create_async_engine(DATABASE_URL)
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
-    print("✅ Banco de dados inicializado com sucesso!")
+        admin = await conn.scalar(select(User.id).where(User.username == "admin"))
+        if admin is None:
+            print("👤 Criando usuário administrador...")
+            await conn.execute(User.__table__.insert().values(
+                username="admin",
+                full_name="Administrator",
+                email="admin@invest.com",
+                password=get_password_hash(os.getenv("ADMIN_PASSWORD", "admin123")),
+                is_active=True,
+            ))
     await engine.dispose()
 
+def init_db():
+    """Aplica as migrations pendentes (alembic upgrade head) e garante o usuário admin"""
+    print("🔄 Conectando ao banco de dados...")
+    if asyncio.run(has_legacy_schema()):
+        print("📦 Schema sem versionamento encontrado, adotando as tabelas existentes nas migrations...")
+
+    print("✨ Aplicando migrations...")
+    command.upgrade(Config(str(ALEMBIC_INI)), "head")
+
+    asyncio.run(ensure_admin())
+    print("✅ Banco de dados inicializado com sucesso!")
+
 if __name__ == "__main__":
-    asyncio.run(init_db())
\ No newline at end of file
+    init_db()
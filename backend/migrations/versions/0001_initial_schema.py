@@ -0,0 +1,109 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Bancos criados pelo antigo create_all (sem alembic_version) já têm clients, assets,
+allocations e movements: essas tabelas são adotadas como estão, com os dados, e só
+as que faltam são criadas. As migrations seguintes se aplicam normalmente sobre elas.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _existing_tables() -> set:
+    if context.is_offline_mode():
+        # SQL gerado para um banco vazio
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+def upgrade():
+    existing = _existing_tables()
+    
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    if "clients" not in existing:
+        op.create_table(
+            "clients",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_clients_id", "clients", ["id"])
+        op.create_index("ix_clients_email", "clients", ["email"], unique=True)
+    
+    if "assets" not in existing:
+        op.create_table(
+            "assets",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("ticker", sa.String(50), nullable=False),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("exchange", sa.String(100)),
+            sa.Column("currency", sa.String(10)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_assets_id", "assets", ["id"])
+        op.create_index("ix_assets_ticker", "assets", ["ticker"], unique=True)
+    
+    if "allocations" not in existing:
+        op.create_table(
+            "allocations",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=False),
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), nullable=False),
+            sa.Column("quantity", sa.Float(), nullable=False),
+            sa.Column("buy_price", sa.Float(), nullable=False),
+            sa.Column("buy_date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_allocations_id", "allocations", ["id"])
+    
+    if "movements" not in existing:
+        op.create_table(
+            "movements",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("client_id", sa.Integer(), nullable=False),
+            sa.Column("type", sa.Enum("DEPOSIT", "WITHDRAWAL", name="movementtype"), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("note", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_movements_id", "movements", ["id"])
+    
+    if "prices" not in existing:
+        op.create_table(
+            "prices",
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), primary_key=True),
+            sa.Column("date", sa.Date(), primary_key=True),
+            sa.Column("open", sa.Float()),
+            sa.Column("high", sa.Float()),
+            sa.Column("low", sa.Float()),
+            sa.Column("close", sa.Float(), nullable=False),
+            sa.Column("volume", sa.BigInteger()),
+        )
+
+def downgrade():
+    op.drop_table("prices")
+    op.drop_table("movements")
+    op.drop_table("allocations")
+    op.drop_table("assets")
+    op.drop_table("clients")
+    op.drop_table("users")
+    sa.Enum(name="movementtype").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,57 @@
+"""client search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+PostgreSQL: índices GIN de trigramas (pg_trgm) para a busca por trecho e
+B-tree em lower(...) text_pattern_ops para a busca por prefixo.
+SQLite: tabela FTS5 com tokenizer trigram, mantida por triggers.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE clients_fts USING fts5("
+            "name, email, content='clients', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute("INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')")
+        op.execute(
+            "CREATE TRIGGER clients_fts_insert AFTER INSERT ON clients BEGIN "
+            "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+        )
+        op.execute(
+            "CREATE TRIGGER clients_fts_delete AFTER DELETE ON clients BEGIN "
+            "INSERT INTO clients_fts(clients_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); END"
+        )
+        op.execute(
+            "CREATE TRIGGER clients_fts_update AFTER UPDATE ON clients BEGIN "
+            "INSERT INTO clients_fts(clients_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); "
+            "INSERT INTO clients_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+        )
+        return
+    
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_clients_name_trgm ON clients USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_clients_email_trgm ON clients USING gin (email gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_clients_name_prefix ON clients (lower(name) text_pattern_ops)")
+    op.execute("CREATE INDEX ix_clients_email_prefix ON clients (lower(email) text_pattern_ops)")
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS clients_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS clients_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS clients_fts_insert")
+        op.execute("DROP TABLE IF EXISTS clients_fts")
+        return
+    
+    op.execute("DROP INDEX IF EXISTS ix_clients_email_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_clients_name_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_clients_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_clients_name_trgm")
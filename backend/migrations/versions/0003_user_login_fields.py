@@ -0,0 +1,25 @@
+"""user login fields
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("username", sa.String(150)))
+        batch.add_column(sa.Column("full_name", sa.String(255)))
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+def downgrade():
+    op.drop_index("ix_users_username", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("full_name")
+        batch.drop_column("username")
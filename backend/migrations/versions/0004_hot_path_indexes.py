@@ -0,0 +1,86 @@
+"""hot path indexes and movements.client_id foreign key
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Índices compostos para os padrões de acesso das listas, resumos e valuation:
+movements(client_id, date), movements(date), allocations(client_id, asset_id)
+e allocations(asset_id). No PostgreSQL os índices são criados com CONCURRENTLY
+(sem bloquear escritas) e a FK entra como NOT VALID e é validada em seguida.
+
+Movimentações cujo cliente já foi excluído (possíveis antes da FK) nunca são apagadas:
+são histórico financeiro. Se existirem, a FK fica NOT VALID no PostgreSQL (vale para as
+linhas novas, sem checar as antigas) e o VALIDATE fica para depois da conciliação manual.
+"""
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+INDEXES = [
+    ("ix_movements_client_id_date", "movements", ["client_id", "date"]),
+    ("ix_movements_date", "movements", ["date"]),
+    ("ix_allocations_client_id_asset_id", "allocations", ["client_id", "asset_id"]),
+    ("ix_allocations_asset_id", "allocations", ["asset_id"]),
+]
+
+def _count_orphan_movements() -> int:
+    if context.is_offline_mode():
+        # Sem banco para consultar: o SQL gerado mantém a FK NOT VALID
+        return -1
+    orphans = op.get_bind().scalar(sa.text(
+        "SELECT count(*) FROM movements WHERE NOT EXISTS (SELECT 1 FROM clients WHERE clients.id = movements.client_id)"
+    ))
+    if orphans:
+        logger.warning(
+            "%d movimentações apontam para clientes inexistentes e foram mantidas; a FK "
+            "fk_movements_client_id não valida essas linhas. Depois de conciliá-las, no PostgreSQL rode "
+            "ALTER TABLE movements VALIDATE CONSTRAINT fk_movements_client_id",
+            orphans,
+        )
+    return orphans
+
+def upgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite não altera constraints: o batch recria a tabela movements com a FK.
+        # A cópia roda sem PRAGMA foreign_keys, então linhas órfãs são preservadas
+        _count_orphan_movements()
+        with op.batch_alter_table("movements") as batch:
+            batch.create_foreign_key("fk_movements_client_id", "clients", ["client_id"], ["id"])
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    orphans = _count_orphan_movements()
+    op.execute(
+        "ALTER TABLE movements ADD CONSTRAINT fk_movements_client_id "
+        "FOREIGN KEY (client_id) REFERENCES clients (id) NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        if orphans == 0:
+            op.execute("ALTER TABLE movements VALIDATE CONSTRAINT fk_movements_client_id")
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        op.execute("ANALYZE movements")
+        op.execute("ANALYZE allocations")
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        with op.batch_alter_table("movements") as batch:
+            batch.drop_constraint("fk_movements_client_id", type_="foreignkey")
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint("fk_movements_client_id", "movements", type_="foreignkey")
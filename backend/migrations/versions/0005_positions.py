@@ -0,0 +1,38 @@
+"""positions ledger
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+Posição consolidada por (cliente, ativo), preenchida a partir das alocações existentes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "positions",
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), primary_key=True),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("average_cost", sa.Float(), nullable=False),
+        sa.Column("total_invested", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_positions_asset_id", "positions", ["asset_id"])
+    op.execute(
+        "INSERT INTO positions (client_id, asset_id, quantity, average_cost, total_invested) "
+        "SELECT client_id, asset_id, sum(quantity), "
+        "CASE WHEN sum(quantity) = 0 THEN 0 ELSE sum(quantity * buy_price) / sum(quantity) END, "
+        "sum(quantity * buy_price) "
+        "FROM allocations GROUP BY client_id, asset_id"
+    )
+
+def downgrade():
+    op.drop_index("ix_positions_asset_id", table_name="positions")
+    op.drop_table("positions")
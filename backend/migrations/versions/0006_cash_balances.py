@@ -0,0 +1,41 @@
+"""cash balance snapshots
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Saldo em caixa por (cliente, dia com movimentação), com o acumulado calculado por
+window function sobre os fluxos diários das movimentações existentes. Os dias são
+contados em UTC, como em app.services.cash_balances.day_expression. Movimentações
+órfãs (cliente excluído antes da FK, mantidas pela 0004) ficam de fora.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "cash_balances",
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("clients.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("net_flow", sa.Float(), nullable=False),
+        sa.Column("balance", sa.Float(), nullable=False),
+    )
+    if op.get_bind().dialect.name == "sqlite":
+        day = "date(date)"
+    else:
+        day = "date(timezone('UTC', date))"
+    op.execute(
+        "INSERT INTO cash_balances (client_id, day, net_flow, balance) "
+        f"SELECT client_id, {day}, sum(signed), sum(sum(signed)) OVER (PARTITION BY client_id ORDER BY {day}) "
+        "FROM (SELECT client_id, date, CASE WHEN type = 'DEPOSIT' THEN amount ELSE -amount END AS signed "
+        "FROM movements WHERE EXISTS (SELECT 1 FROM clients WHERE clients.id = movements.client_id)) AS flows "
+        f"GROUP BY client_id, {day}"
+    )
+
+def downgrade():
+    op.drop_table("cash_balances")
@@ -0,0 +1,19 @@
+import asyncio
+import sys
+from app.database import AsyncSessionLocal, engine
+from app.models.client import Client
+from app.models.asset import Asset, Allocation
+from app.models.position import Position
+from app.services.positions import rebuild_positions
+
+async def main(client_id=None):
+    target = f"do cliente {client_id}" if client_id is not None else "de todos os clientes"
+    print(f"🔄 Recalculando posições {target} a partir das alocações...")
+    async with AsyncSessionLocal() as session:
+        rows = await rebuild_positions(session, client_id=client_id)
+    
+    print(f"✅ {rows} posições gravadas")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,20 @@
+import asyncio
+from app.database import AsyncSessionLocal, engine
+from app.models.client import Client
+from app.models.asset import Asset
+from app.models.price import Price
+from app.services.price_history import refresh_prices
+
+async def main():
+    print("🔄 Atualizando histórico de preços...")
+    async with AsyncSessionLocal() as session:
+        result = await refresh_prices(session)
+    
+    print(f"✅ {result['inserted']} barras inseridas para {result['assets']} ativos "
+          f"em {result['provider_calls']} chamadas ao provedor")
+    if result["failed"]:
+        print(f"⚠️  Falharam: {', '.join(result['failed'])}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
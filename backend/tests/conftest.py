@@ -0,0 +1,65 @@
+"""Fixtures dos testes: banco próprio, migrado pelo Alembic e limpo a cada teste
+
+Os testes nunca usam o DATABASE_URL do ambiente: por padrão um SQLite temporário,
+ou o banco de TEST_DATABASE_URL (ex.: um PostgreSQL descartável no CI).
+"""
+import os
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_TMP_DIR = tempfile.mkdtemp(prefix="investcase-tests-")
+
+# Precisa estar no ambiente antes de importar app.database
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite+aiosqlite:///{_TMP_DIR}/test.db"
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ["MARKET_DATA_PROVIDER"] = "stub"
+os.environ["PRICE_REFRESH_ENABLED"] = "false"
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import delete
+
+from app.auth.dependencies import get_current_user
+from app.database import AsyncSessionLocal, Base, engine
+# Todos os modelos registrados no metadata, para a limpeza entre testes
+from app.models.client import Client
+from app.models.asset import Asset, Allocation
+from app.models.movement import Movement
+from app.models.price import Price
+from app.models.position import Position
+from app.models.cash_balance import CashBalance
+from app.models.user import User
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(config, "head")
+
+@pytest.fixture
+async def session(migrated_db):
+    """Sessão no banco migrado, com todas as tabelas vazias"""
+    async with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            await connection.execute(delete(table))
+    async with AsyncSessionLocal() as session:
+        yield session
+    # As conexões do pool ficam presas ao event loop de cada teste
+    await engine.dispose()
+
+@pytest.fixture
+async def api(session):
+    """Cliente HTTP da API, já autenticado"""
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: {"username": "admin"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.asset import Allocation, Asset
+from app.models.client import Client
+
+@pytest.fixture
+async def allocations(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    asset = Asset(ticker="PETR4", name="Petrobras PN", exchange="B3", currency="BRL")
+    session.add_all([client, asset])
+    await session.flush()
+    session.add_all([
+        Allocation(client_id=client.id, asset_id=asset.id, quantity=1.0, buy_price=10.0, buy_date=datetime(2024, 1, 2))
+        for _ in range(150)
+    ])
+    await session.commit()
+    return client
+
+@pytest.mark.anyio
+async def test_allocations_without_limit_are_not_truncated(api, allocations):
+    response = await api.get("/api/assets/allocations")
+    assert response.status_code == 200
+    assert len(response.json()) == 150
+
+    response = await api.get(f"/api/assets/clients/{allocations.id}/allocations")
+    assert response.status_code == 200
+    assert len(response.json()) == 150
+
+@pytest.mark.anyio
+async def test_allocations_keyset_pages(api, allocations):
+    first = (await api.get("/api/assets/allocations", params={"limit": 100})).json()
+    rest = (await api.get("/api/assets/allocations", params={"limit": 100, "after_id": first[-1]["id"]})).json()
+
+    assert len(first) == 100
+    assert len(rest) == 50
+    assert [row["id"] for row in first + rest] == sorted(row["id"] for row in first + rest)
@@ -0,0 +1,36 @@
+import pytest
+
+from app.models.asset import Asset
+from app.services.cache import get_versions
+from app.services.market_data import StubMarketDataProvider, set_market_data_provider
+
+@pytest.fixture
+def stub_provider():
+    return set_market_data_provider(
+        StubMarketDataProvider(assets={"VALE3.SA": {"name": "Vale ON", "exchange": "SAO"}})
+    ).provider
+
+@pytest.mark.anyio
+async def test_search_bumps_assets_version_only_when_it_creates_the_asset(session, api, stub_provider):
+    session.add(Asset(ticker="PETR4.SA", name="Petrobras PN"))
+    await session.commit()
+    version = get_versions(("assets",))
+
+    found = await api.post("/api/assets/search/petr4.sa")
+    assert found.status_code == 200
+    assert found.json()["ticker"] == "PETR4.SA"
+    # Ativo já cadastrado: nem provedor nem invalidação de cache
+    assert stub_provider.calls == 0
+    assert get_versions(("assets",)) == version
+
+    created = await api.post("/api/assets/search/VALE3.SA")
+    assert created.status_code == 200
+    assert created.json()["name"] == "Vale ON"
+    assert get_versions(("assets",)) != version
+
+@pytest.mark.anyio
+async def test_search_unknown_ticker(api, stub_provider):
+    response = await api.post("/api/assets/search/NOPE3.SA")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Ativo NOPE3.SA não encontrado"
@@ -0,0 +1,44 @@
+import pytest
+
+from app.auth.security import get_password_hash
+from app.models.user import User
+from app.routes import auth
+
+@pytest.fixture
+async def user(session):
+    user = User(username="ana", email="ana@invest.com", full_name="Ana", password=get_password_hash("s3nha"), is_active=True)
+    session.add(user)
+    await session.commit()
+    return user
+
+@pytest.fixture
+def checked_hashes(monkeypatch):
+    """Hashes conferidos pelo bcrypt em cada tentativa de login"""
+    checked = []
+    verify = auth.verify_password_async
+
+    async def recording_verify(password, hashed):
+        checked.append(hashed)
+        return await verify(password, hashed)
+
+    monkeypatch.setattr(auth, "verify_password_async", recording_verify)
+    return checked
+
+@pytest.mark.anyio
+async def test_login_by_username_or_email(api, user, checked_hashes):
+    for login in ("ana", "ana@invest.com"):
+        response = await api.post("/api/token", data={"username": login, "password": "s3nha"})
+        assert response.status_code == 200
+        assert response.json()["username"] == "ana"
+    assert checked_hashes == [user.password, user.password]
+
+@pytest.mark.anyio
+async def test_unknown_user_still_pays_for_bcrypt(api, user, checked_hashes, capsys):
+    wrong_password = await api.post("/api/token", data={"username": "ana", "password": "errada"})
+    unknown_user = await api.post("/api/token", data={"username": "bia", "password": "errada"})
+
+    assert wrong_password.status_code == unknown_user.status_code == 401
+    assert wrong_password.json() == unknown_user.json()
+    # Os dois caminhos passam pelo bcrypt, e nada do login vai para a saída
+    assert checked_hashes == [user.password, auth._DUMMY_PASSWORD_HASH]
+    assert "bia" not in capsys.readouterr().out
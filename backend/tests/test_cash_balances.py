@@ -0,0 +1,69 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+from app.services.cash_balances import (
+    apply_movements,
+    balance_at,
+    check_cash_balances,
+    rebuild_cash_balances,
+)
+
+async def _add_movements(session, movements):
+    session.add_all(Movement(**movement) for movement in movements)
+    await apply_movements(session, movements)
+    await session.commit()
+
+def _movement(client_id, kind, amount, day):
+    return {"client_id": client_id, "type": kind, "amount": amount, "date": datetime.combine(day, datetime.min.time())}
+
+@pytest.fixture
+async def client_id(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    session.add(client)
+    await session.commit()
+    return client.id
+
+async def _balance(session, client_id, at):
+    snapshot = await balance_at(session, client_id, at)
+    return None if snapshot is None else snapshot.balance
+
+@pytest.mark.anyio
+async def test_backdated_movement_shifts_every_later_balance(session, client_id):
+    await _add_movements(session, [
+        _movement(client_id, MovementType.DEPOSIT, 1000.0, date(2024, 1, 10)),
+        _movement(client_id, MovementType.WITHDRAWAL, 200.0, date(2024, 3, 5)),
+    ])
+    assert await _balance(session, client_id, date(2024, 2, 29)) == pytest.approx(1000.0)
+    assert await _balance(session, client_id, date(2024, 3, 31)) == pytest.approx(800.0)
+
+    # Retroativa, anterior a todas as linhas existentes
+    await _add_movements(session, [_movement(client_id, MovementType.DEPOSIT, 50.0, date(2023, 12, 20))])
+    # Retroativa, no meio do histórico e num dia que já tem linha
+    await _add_movements(session, [_movement(client_id, MovementType.WITHDRAWAL, 30.0, date(2024, 1, 10))])
+
+    assert await _balance(session, client_id, date(2023, 12, 31)) == pytest.approx(50.0)
+    assert await _balance(session, client_id, date(2024, 1, 10)) == pytest.approx(1020.0)
+    assert await _balance(session, client_id, date(2024, 3, 31)) == pytest.approx(820.0)
+    assert await _balance(session, client_id, date(2023, 1, 1)) is None
+    assert await check_cash_balances(session) == []
+
+@pytest.mark.anyio
+async def test_checker_reports_drift_and_rebuild_fixes_it(session, client_id):
+    await _add_movements(session, [
+        _movement(client_id, MovementType.DEPOSIT, 100.0, date(2024, 1, 1)),
+        _movement(client_id, MovementType.DEPOSIT, 100.0, date(2024, 1, 2)),
+    ])
+    # Movimentação gravada sem passar pelo upsert dos saldos
+    session.add(Movement(**_movement(client_id, MovementType.WITHDRAWAL, 40.0, date(2024, 1, 1))))
+    await session.commit()
+
+    mismatches = await check_cash_balances(session)
+    assert {str(mismatch["day"]) for mismatch in mismatches} == {"2024-01-01", "2024-01-02"}
+
+    await rebuild_cash_balances(session)
+
+    assert await check_cash_balances(session) == []
+    assert await _balance(session, client_id, date(2024, 1, 2)) == pytest.approx(160.0)
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+
+@pytest.mark.anyio
+async def test_delete_client_with_movements_is_rejected(session, api):
+    client = Client(name="Ana", email="ana@invest.com")
+    session.add(client)
+    await session.flush()
+    session.add(Movement(client_id=client.id, type=MovementType.DEPOSIT, amount=100.0, date=datetime(2024, 1, 2)))
+    await session.commit()
+
+    response = await api.delete(f"/api/clients/{client.id}")
+
+    assert response.status_code == 400
+    assert await session.scalar(select(func.count(Client.id))) == 1
+    assert await session.scalar(select(func.count(Movement.id))) == 1
+
+@pytest.mark.anyio
+async def test_delete_client_without_history(session, api):
+    client = Client(name="Bia", email="bia@invest.com")
+    session.add(client)
+    await session.commit()
+
+    response = await api.delete(f"/api/clients/{client.id}")
+
+    assert response.status_code == 200
+    assert await session.scalar(select(func.count(Client.id))) == 0
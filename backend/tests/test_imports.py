@@ -0,0 +1,98 @@
+import io
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.asset import Asset, Allocation
+from app.models.cash_balance import CashBalance
+from app.models.client import Client
+from app.models.movement import Movement
+from app.models.position import Position
+from app.services import bulk_import
+from app.services.cash_balances import check_cash_balances
+
+@pytest.fixture
+async def client_and_asset(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    asset = Asset(ticker="PETR4.SA", name="Petrobras PN")
+    session.add_all([client, asset])
+    await session.commit()
+    return client, asset
+
+def _csv(*lines):
+    return {"file": ("extrato.csv", "\n".join(lines).encode(), "text/csv")}
+
+@pytest.mark.anyio
+async def test_invalid_rows_are_reported_and_the_rest_imported(session, api, client_and_asset):
+    client, _ = client_and_asset
+
+    response = await api.post("/api/imports/movements", files=_csv(
+        "client_id,type,amount,date,note",
+        f"{client.id},deposit,1000,2024-01-02,aporte",
+        f"{client.id},transfer,50,2024-01-03,",
+        f"{client.id},withdrawal,abc,2024-01-04,",
+        f"{client.id + 1000},deposit,10,2024-01-05,",
+    ))
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (4, 1, 3)
+    # Número da linha do CSV, contando o cabeçalho
+    assert [error["row"] for error in result["errors"]] == [3, 4, 5]
+    assert result["errors"][0]["error"].startswith("type:")
+    assert result["errors"][2]["error"] == "Cliente não encontrado"
+    assert await session.scalar(select(func.count(Movement.id))) == 1
+
+@pytest.mark.anyio
+async def test_movement_import_updates_cash_balances(session, api, client_and_asset):
+    client, _ = client_and_asset
+
+    response = await api.post("/api/imports/movements", files=_csv(
+        "client_id,type,amount,date",
+        f"{client.id},deposit,1000,2024-01-02",
+        f"{client.id},withdrawal,300,2024-01-05",
+        f"{client.id},deposit,50,2024-01-02",
+    ))
+
+    assert response.json()["imported"] == 3
+    result = await session.execute(
+        select(CashBalance.day, CashBalance.net_flow, CashBalance.balance).order_by(CashBalance.day)
+    )
+    assert [tuple(row) for row in result] == [(date(2024, 1, 2), 1050.0, 1050.0), (date(2024, 1, 5), -300.0, 750.0)]
+    assert await check_cash_balances(session) == []
+
+@pytest.mark.anyio
+async def test_allocation_import_by_ticker_updates_positions(session, api, client_and_asset):
+    client, asset = client_and_asset
+
+    response = await api.post("/api/imports/allocations", files=_csv(
+        "client_id,ticker,quantity,buy_price,buy_date",
+        f"{client.id},petr4.sa,10,30.0,2024-01-02",
+        f"{client.id},PETR4.SA,30,34.0,2024-01-03",
+        f"{client.id},VALE3.SA,5,60.0,2024-01-03",
+    ))
+
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 1)
+    assert result["errors"] == [{"row": 4, "error": "Ativo VALE3.SA não encontrado"}]
+    position = (await session.execute(select(Position))).scalar_one()
+    assert (position.asset_id, position.quantity, position.average_cost) == (asset.id, 40.0, 33.0)
+
+@pytest.mark.anyio
+async def test_sqlite_loads_batches_with_multi_row_insert(session, client_and_asset, monkeypatch):
+    client, asset = client_and_asset
+    if session.bind.dialect.name != "sqlite":
+        pytest.skip("o COPY do asyncpg substitui o INSERT multi-linha no PostgreSQL")
+    # Lotes pequenos: a importação passa por vários INSERTs multi-linha
+    monkeypatch.setattr(bulk_import._read_csv_batches, "__defaults__", (4,))
+    rows = "\n".join(f"{client.id},{asset.id},1,{10 + i},2024-01-{i + 1:02d}" for i in range(10))
+    file = io.BytesIO(f"client_id,asset_id,quantity,buy_price,buy_date\n{rows}".encode())
+
+    result = await bulk_import.import_allocations(session, file)
+
+    assert (result["total_rows"], result["imported"], result["failed"]) == (10, 10, 0)
+    buy_dates = (await session.execute(select(Allocation.buy_date).order_by(Allocation.id))).scalars().all()
+    assert [moment.replace(tzinfo=None) for moment in buy_dates] == [datetime(2024, 1, i + 1) for i in range(10)]
+    position = (await session.execute(select(Position))).scalar_one()
+    assert (position.quantity, position.total_invested) == (10.0, sum(10 + i for i in range(10)))
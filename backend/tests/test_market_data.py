@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.market_data import MarketDataProvider, MarketDataService, StubMarketDataProvider
+
+class SlowStubProvider(StubMarketDataProvider):
+    """Stub que demora na consulta, para as chamadas simultâneas se sobreporem"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def fetch_asset_info(self, ticker):
+        time.sleep(0.05)
+        with self._lock:
+            return super().fetch_asset_info(ticker)
+
+@pytest.fixture
+def provider():
+    return SlowStubProvider(assets={"PETR4.SA": {"name": "Petrobras PN", "exchange": "SAO"}})
+
+@pytest.fixture
+def service(provider):
+    service = MarketDataService(provider, max_workers=4)
+    yield service
+    service.shutdown()
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_share_one_provider_call(service, provider):
+    results = await asyncio.gather(*(service.get_asset_info("petr4.sa") for _ in range(10)))
+
+    assert provider.calls == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]["ticker"] == "PETR4.SA"
+    assert results[0]["name"] == "Petrobras PN"
+
+@pytest.mark.anyio
+async def test_found_ticker_is_served_from_cache(service, provider):
+    await service.get_asset_info("PETR4.SA")
+    await service.get_asset_info("PETR4.SA")
+
+    assert provider.calls == 1
+
+@pytest.mark.anyio
+async def test_unknown_ticker_is_negatively_cached(service, provider):
+    assert await service.get_asset_info("NOPE3.SA") is None
+    assert await service.get_asset_info("NOPE3.SA") is None
+
+    assert provider.calls == 1
+
+@pytest.mark.anyio
+async def test_clear_drops_negative_cache(service, provider):
+    await service.get_asset_info("NOPE3.SA")
+    service.clear()
+    await service.get_asset_info("NOPE3.SA")
+
+    assert provider.calls == 2
+
+def test_provider_must_implement_every_fetch():
+    class QuotesOnlyProvider(MarketDataProvider):
+        def fetch_quotes(self, tickers):
+            return {}
+
+    with pytest.raises(TypeError):
+        QuotesOnlyProvider()
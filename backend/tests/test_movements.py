@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+
+@pytest.fixture
+async def movements(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    session.add(client)
+    await session.flush()
+    session.add_all([
+        Movement(client_id=client.id, type=MovementType.DEPOSIT, amount=10.0, date=datetime(2024, 1, 1) + timedelta(days=day))
+        for day in range(150)
+    ])
+    await session.commit()
+    return client
+
+@pytest.mark.anyio
+async def test_movements_without_limit_are_not_truncated(api, movements):
+    response = await api.get("/api/movements/")
+
+    assert response.status_code == 200
+    assert len(response.json()["movements"]) == 150
+    assert response.json()["next_cursor"] is None
+
+@pytest.mark.anyio
+async def test_movements_cursor_pages(api, movements):
+    first = (await api.get("/api/movements/", params={"limit": 100})).json()
+    rest = (await api.get("/api/movements/", params={"limit": 100, "cursor": first["next_cursor"]})).json()
+
+    assert len(first["movements"]) == 100
+    assert len(rest["movements"]) == 50
+    assert rest["next_cursor"] is None
+    dates = [row["date"] for row in first["movements"] + rest["movements"]]
+    assert dates == sorted(dates, reverse=True)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.models.asset import Asset, Allocation
+from app.models.client import Client
+from app.models.position import Position
+from app.services.positions import apply_allocations, rebuild_positions
+
+async def _client_and_assets(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    petr = Asset(ticker="PETR4.SA", name="Petrobras PN")
+    aapl = Asset(ticker="AAPL", name="Apple")
+    session.add_all([client, petr, aapl])
+    await session.flush()
+    return client, petr, aapl
+
+async def _insert_lots(session, lots):
+    session.add_all(Allocation(**lot) for lot in lots)
+    await apply_allocations(session, lots)
+    await session.commit()
+
+async def _positions(session):
+    result = await session.execute(
+        select(Position.client_id, Position.asset_id, Position.quantity, Position.average_cost, Position.total_invested)
+        .order_by(Position.client_id, Position.asset_id)
+    )
+    return [tuple(row) for row in result]
+
+@pytest.mark.anyio
+async def test_upsert_accumulates_lots_with_weighted_average_cost(session):
+    client, petr, aapl = await _client_and_assets(session)
+    lot = {"client_id": client.id, "buy_date": datetime(2024, 1, 2)}
+
+    # Dois lotes do mesmo ativo no mesmo comando e um terceiro em outra transação
+    await _insert_lots(session, [
+        {**lot, "asset_id": petr.id, "quantity": 10, "buy_price": 30.0},
+        {**lot, "asset_id": petr.id, "quantity": 30, "buy_price": 34.0},
+        {**lot, "asset_id": aapl.id, "quantity": 2, "buy_price": 180.0},
+    ])
+    await _insert_lots(session, [{**lot, "asset_id": petr.id, "quantity": 10, "buy_price": 40.0}])
+
+    positions = {row[1]: row for row in await _positions(session)}
+    _, _, quantity, average_cost, total_invested = positions[petr.id]
+    assert quantity == 50
+    assert total_invested == pytest.approx(10 * 30.0 + 30 * 34.0 + 10 * 40.0)
+    assert average_cost == pytest.approx(total_invested / 50)
+    assert positions[aapl.id][2:] == pytest.approx((2, 180.0, 360.0))
+
+@pytest.mark.anyio
+async def test_upsert_matches_rebuild_from_allocations(session):
+    client, petr, aapl = await _client_and_assets(session)
+    for quantity, price in ((5, 31.0), (7, 29.5), (1, 33.25)):
+        await _insert_lots(session, [
+            {"client_id": client.id, "asset_id": petr.id, "quantity": quantity,
+             "buy_price": price, "buy_date": datetime(2024, 2, quantity)},
+        ])
+    incremental = await _positions(session)
+
+    await rebuild_positions(session)
+
+    assert await _positions(session) == pytest.approx(incremental)
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.asset import Asset
+from app.models.client import Client
+from app.models.position import Position
+from app.services.cache import get_versions
+from app.services.price_scheduler import PriceRefreshScheduler
+
+@pytest.fixture
+async def held_asset(session):
+    client = Client(name="Ana", email="ana@invest.com")
+    asset = Asset(ticker="PETR4.SA", name="Petrobras PN", exchange="SAO", currency="BRL")
+    session.add_all([client, asset])
+    await session.flush()
+    session.add(Position(client_id=client.id, asset_id=asset.id, quantity=10.0, average_cost=30.0, total_invested=300.0))
+    await session.commit()
+    return asset
+
+def scheduler_with_closes(closes):
+    """Agendador cujo provedor devolve, a cada execução, o próximo fechamento de `closes` para hoje"""
+    scheduler = PriceRefreshScheduler(initial_delay=0, rate=1000, burst=10, retries=0)
+    closes = iter(closes)
+
+    async def fetch(tickers, start):
+        close = next(closes)
+        # Uma barra de ontem e a de hoje, que muda ao longo do pregão
+        bars = [{"date": date.today() - timedelta(days=1), "close": 30.0}, {"date": date.today(), "close": close}]
+        return {ticker: [bar for bar in bars if bar["date"] >= start] for ticker in tickers}
+
+    scheduler._fetch = fetch
+    return scheduler
+
+@pytest.mark.anyio
+async def test_refetched_bar_bumps_prices_only_when_it_changes(session, held_asset):
+    scheduler = scheduler_with_closes([31.0, 31.0, 32.5])
+
+    first = await scheduler.run_once()
+    after_first = get_versions(("prices",))
+    second = await scheduler.run_once()
+    after_second = get_versions(("prices",))
+    third = await scheduler.run_once()
+
+    assert first["inserted"] == 2
+    # Mesmo fechamento: a barra é buscada de novo, mas nada é reescrito nem invalidado
+    assert second["inserted"] == 0
+    assert after_second == after_first
+    assert third["inserted"] == 1
+    assert get_versions(("prices",)) != after_second
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models.asset import Asset, Allocation
+from app.models.client import Client
+from app.routes import stream
+from app.services.market_data import StubMarketDataProvider, set_market_data_provider
+from app.services.positions import rebuild_positions
+from app.services.price_stream import PriceHub, Subscriber, price_hub
+
+def test_stub_quotes_are_reproducible_for_the_same_seed():
+    first = StubMarketDataProvider(seed=7)
+    second = StubMarketDataProvider(seed=7)
+
+    series = [first.fetch_quotes(["PETR4.SA", "AAPL"]) for _ in range(5)]
+    replay = [second.fetch_quotes(["PETR4.SA", "AAPL"]) for _ in range(5)]
+
+    prices = [{ticker: quote["price"] for ticker, quote in tick.items()} for tick in series]
+    assert prices == [{ticker: quote["price"] for ticker, quote in tick.items()} for tick in replay]
+    # O passeio anda: os preços não ficam parados no valor base
+    assert len({tick["PETR4.SA"] for tick in prices}) > 1
+
+def test_stub_quotes_depend_on_seed_and_start_from_stub_close():
+    prices = {"PETR4.SA": [{"date": "2024-01-02", "close": 30.0}]}
+    base = StubMarketDataProvider(prices=prices, seed=1).fetch_quotes(["PETR4.SA"])["PETR4.SA"]["price"]
+    other = StubMarketDataProvider(prices=prices, seed=2).fetch_quotes(["PETR4.SA"])["PETR4.SA"]["price"]
+
+    assert base != other
+    assert abs(base - 30.0) < 0.5
+
+def test_subscriber_keeps_only_latest_message_per_key():
+    subscriber = Subscriber()
+    for price in (10.0, 10.5, 11.0):
+        subscriber.push(("quote", "AAPL"), {"ticker": "AAPL", "price": price})
+    subscriber.push(("quote", "PETR4.SA"), {"ticker": "PETR4.SA", "price": 30.0})
+
+    batch = asyncio.run(subscriber.next_batch())
+
+    assert batch == [{"ticker": "AAPL", "price": 11.0}, {"ticker": "PETR4.SA", "price": 30.0}]
+    assert subscriber.coalesced == 2
+
+@pytest.fixture
+def stub_provider():
+    return set_market_data_provider(StubMarketDataProvider(seed=3)).provider
+
+@pytest.mark.anyio
+async def test_tick_fetches_each_ticker_once_and_coalesces_for_slow_consumers(session, stub_provider):
+    client = Client(name="Ana", email="ana@invest.com")
+    asset = Asset(ticker="AAPL", name="Apple")
+    session.add_all([client, asset])
+    await session.flush()
+    session.add(Allocation(client_id=client.id, asset_id=asset.id, quantity=10, buy_price=100.0,
+                           buy_date=datetime(2024, 1, 2)))
+    await session.commit()
+    await rebuild_positions(session)
+
+    hub = PriceHub(interval=3600, batch_size=10)
+    slow = Subscriber()
+    fast = Subscriber()
+    # Sem register(): o teste dirige os ticks, sem o poller em segundo plano
+    hub.subscribers.update({slow, fast})
+    await hub.subscribe(slow, tickers=["aapl"], client_ids=[client.id])
+    await hub.subscribe(fast, tickers=["AAPL"])
+
+    await hub.tick()
+    fast_batches = [await fast.next_batch()]
+    for _ in range(4):
+        await hub.tick()
+        fast_batches.append(await fast.next_batch())
+
+    # Um único lote por tick no provedor, compartilhado pelas duas conexões (e pela carteira)
+    assert stub_provider.calls == 5
+    assert hub.ticks == 5
+    assert all(len(batch) == 1 for batch in fast_batches)
+
+    # O consumidor lento recebe só a cotação e o valor de carteira mais recentes
+    pending = await slow.next_batch()
+    quotes = [message for message in pending if message["type"] == "quote"]
+    portfolios = [message for message in pending if message["type"] == "portfolio"]
+    assert [quote["price"] for quote in quotes] == [hub.quotes["AAPL"]["price"]]
+    assert len(portfolios) == 1
+    assert portfolios[0]["market_value"] == pytest.approx(10 * hub.quotes["AAPL"]["price"])
+    assert portfolios[0]["cost"] == pytest.approx(1000.0)
+    assert slow.coalesced > 0
+
+class StalledWebSocket:
+    """WebSocket cujo envio nunca termina, como um cliente que parou de ler"""
+
+    def __init__(self):
+        self.close_code = None
+
+    async def send_text(self, data):
+        await asyncio.Event().wait()
+
+    async def close(self, code):
+        self.close_code = code
+
+@pytest.mark.anyio
+async def test_slow_consumer_is_disconnected_after_send_timeout(monkeypatch):
+    monkeypatch.setattr(stream, "PRICE_STREAM_SEND_TIMEOUT", 0.01)
+    websocket = StalledWebSocket()
+    subscriber = Subscriber()
+    subscriber.push(("quote", "AAPL"), {"type": "quote", "ticker": "AAPL", "price": 10.0})
+    disconnects = price_hub.stats()["slow_disconnects"]
+
+    await asyncio.wait_for(stream._send_updates(websocket, subscriber), timeout=1)
+
+    assert websocket.close_code == 1013
+    assert price_hub.stats()["slow_disconnects"] == disconnects + 1
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.query_plans import collect_plans, plan_cases
+from app.database import engine
+
+CASE_NAMES = [name for name, _ in plan_cases(engine.dialect.name)]
+
+@pytest.fixture
+async def plans(session):
+    async with engine.connect() as connection:
+        return dict(await collect_plans(connection))
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("case", CASE_NAMES)
+async def test_query_uses_index(plans, case):
+    accesses = plans[case]
+    assert accesses, f"{case}: nenhum acesso a movements/allocations no plano"
+    full_scans = [(table, kind) for table, kind, _, is_full_scan in accesses if is_full_scan]
+    assert not full_scans, f"{case}: varredura completa em {full_scans}"
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.models.client import Client
+from app.models.movement import Movement, MovementType
+from app.services.returns import compute_returns, returns_cache
+
+START = date(2023, 1, 2).toordinal()
+
+def _returns(flows=(), lots=(), prices=(), start_day=START, end_day=START + 365):
+    """compute_returns a partir de tuplas (cliente, dia, valor), (cliente, ativo, qtd, preço, dia) e (ativo, dia, fechamento)"""
+    flows, lots, prices = sorted(flows), sorted(lots), sorted(prices)
+    columns = lambda rows, width: [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+    return compute_returns(*columns(flows, 3), *columns(lots, 5), *columns(prices, 3), start_day, end_day)
+
+def test_known_returns_for_several_clients_in_one_batch():
+    # Cliente 1 ganha 10% no ano, cliente 2 perde 5%: um único Newton vetorizado para os dois
+    result = _returns(
+        flows=[(1, START, 1000.0), (2, START, 2000.0)],
+        lots=[(1, 1, 10, 100.0, START), (2, 2, 20, 50.0, START)],
+        prices=[(1, START + 365, 110.0), (2, START + 365, 45.0)],
+    )
+
+    assert result["client_id"].tolist() == [1, 2]
+    np.testing.assert_allclose(result["start_value"], [1000.0, 2000.0])
+    np.testing.assert_allclose(result["end_value"], [1100.0, 1900.0])
+    np.testing.assert_allclose(result["twr"], [0.10, -0.05])
+    np.testing.assert_allclose(result["xirr"], [0.10, -0.05], atol=1e-9)
+
+def test_cash_flow_in_the_middle_of_the_window():
+    # Aporte de 1100 após um ano: TWR encadeia 1,1 x 1,1; a TIR que zera -1000 - 1100/(1+r) + 2420/(1+r)² é 10%
+    result = _returns(
+        flows=[(1, START, 1000.0), (1, START + 365, 1100.0)],
+        lots=[(1, 1, 10, 100.0, START)],
+        prices=[(1, START + 365, 110.0), (1, START + 730, 132.0)],
+        end_day=START + 730,
+    )
+
+    np.testing.assert_allclose(result["end_value"], [2420.0])
+    np.testing.assert_allclose(result["net_flow"], [1100.0])
+    np.testing.assert_allclose(result["twr"], [0.21])
+    np.testing.assert_allclose(result["xirr"], [0.10], atol=1e-9)
+
+def test_series_without_sign_change_has_no_xirr():
+    # Nada investido no início nem durante a janela: só o valor final, sem troca de sinal
+    result = _returns(
+        lots=[(1, 1, 10, 100.0, START + 10)],
+        prices=[(1, START + 365, 110.0)],
+    )
+
+    np.testing.assert_allclose(result["end_value"], [100.0])
+    assert np.isnan(result["xirr"][0])
+
+@pytest.mark.anyio
+async def test_new_movement_invalidates_cached_returns(session, api):
+    returns_cache.clear()
+    client = Client(name="Ana", email="ana@invest.com")
+    session.add(client)
+    await session.flush()
+    session.add(Movement(client_id=client.id, type=MovementType.DEPOSIT, amount=1000.0, date=datetime(2024, 1, 2)))
+    await session.commit()
+    params = {"start_date": "2024-01-01", "end_date": "2024-12-31"}
+
+    before = (await api.get(f"/api/portfolio/returns/{client.id}", params=params)).json()
+    hits = returns_cache.hits
+    assert (await api.get(f"/api/portfolio/returns/{client.id}", params=params)).json() == before
+    assert returns_cache.hits == hits + 1
+    response = await api.post("/api/movements/", json={
+        "client_id": client.id, "type": "withdrawal", "amount": 400.0, "date": "2024-06-03T00:00:00",
+    })
+    assert response.status_code == 200
+    after = (await api.get(f"/api/portfolio/returns/{client.id}", params=params)).json()
+
+    assert (before["net_flow"], before["end_value"]) == (1000.0, 1000.0)
+    assert (after["net_flow"], after["end_value"]) == (600.0, 600.0)
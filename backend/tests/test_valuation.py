@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models.asset import Allocation, Asset
+from app.models.client import Client
+from app.models.price import Price
+from app.services.positions import apply_allocations
+from app.services.valuation import compute_valuation
+
+@pytest.fixture
+async def portfolios(session):
+    ana = Client(name="Ana", email="ana@invest.com")
+    bia = Client(name="Bia", email="bia@invest.com")
+    petr = Asset(ticker="PETR4.SA", name="Petrobras PN")
+    aapl = Asset(ticker="AAPL", name="Apple")
+    session.add_all([ana, bia, petr, aapl])
+    await session.flush()
+    lots = [
+        {"client_id": ana.id, "asset_id": petr.id, "quantity": 10, "buy_price": 30.0, "buy_date": datetime(2024, 1, 2)},
+        {"client_id": ana.id, "asset_id": aapl.id, "quantity": 2, "buy_price": 180.0, "buy_date": datetime(2024, 1, 2)},
+        {"client_id": bia.id, "asset_id": petr.id, "quantity": 5, "buy_price": 32.0, "buy_date": datetime(2024, 1, 3)},
+    ]
+    session.add_all(Allocation(**lot) for lot in lots)
+    await apply_allocations(session, lots)
+    # Dois pregões de PETR4: vale o último; AAPL sem preço fica pelo custo médio
+    session.add_all([
+        Price(asset_id=petr.id, date=date(2024, 1, 2), close=31.0),
+        Price(asset_id=petr.id, date=date(2024, 1, 5), close=35.0),
+    ])
+    await session.commit()
+    return ana, bia, petr, aapl
+
+@pytest.mark.anyio
+async def test_office_valuation_uses_last_close_and_cost_for_unpriced(api, portfolios):
+    ana, bia, petr, aapl = portfolios
+
+    valuation = (await api.get("/api/portfolio/valuation")).json()
+
+    assert valuation["as_of"] == "2024-01-05"
+    assert (valuation["cost"], valuation["market_value"]) == (820.0, 885.0)
+    assert valuation["unrealized_pnl"] == pytest.approx(65.0)
+    clients = {client["client_id"]: client for client in valuation["clients"]}
+    assert (clients[ana.id]["market_value"], clients[ana.id]["unrealized_pnl"]) == (710.0, 50.0)
+    assert (clients[bia.id]["market_value"], clients[bia.id]["unrealized_pnl"]) == (175.0, 15.0)
+    assets = {asset["ticker"]: asset for asset in valuation["assets"]}
+    assert assets["PETR4.SA"]["quantity"] == 15.0
+    assert assets["PETR4.SA"]["weight"] == pytest.approx(525.0 / 885.0)
+    assert assets["AAPL"]["weight"] == pytest.approx(360.0 / 885.0)
+
+@pytest.mark.anyio
+async def test_client_valuation_holdings_and_weights(api, portfolios):
+    ana, _, petr, aapl = portfolios
+
+    response = await api.get(f"/api/portfolio/valuation/{ana.id}")
+
+    assert response.status_code == 200
+    valuation = response.json()
+    assert (valuation["cost"], valuation["market_value"]) == (660.0, 710.0)
+    holdings = {holding["ticker"]: holding for holding in valuation["holdings"]}
+    assert (holdings["PETR4.SA"]["price"], holdings["PETR4.SA"]["priced"]) == (35.0, True)
+    assert (holdings["AAPL"]["price"], holdings["AAPL"]["priced"]) == (180.0, False)
+    assert holdings["AAPL"]["unrealized_pnl"] == 0.0
+    assert holdings["PETR4.SA"]["weight"] == pytest.approx(350.0 / 710.0)
+    assert holdings["AAPL"]["weight"] == pytest.approx(360.0 / 710.0)
+
+@pytest.mark.anyio
+async def test_client_valuation_unknown_client(api, portfolios):
+    response = await api.get("/api/portfolio/valuation/999999")
+
+    assert response.status_code == 404
+
+def test_price_lookup_with_unsorted_prices_and_ids_past_the_last_price():
+    # Preços fora de ordem e um ativo (9) maior que todos os precificados: cai no custo médio
+    result = compute_valuation(
+        client_ids=[1, 1, 2], asset_ids=[3, 9, 1], quantities=[2, 4, 1], costs=[20.0, 40.0, 5.0],
+        price_asset_ids=[3, 1], price_values=[12.0, 7.0],
+    )
+
+    positions = result["positions"]
+    assert positions["price"].tolist() == [12.0, 10.0, 7.0]
+    assert positions["priced"].tolist() == [True, False, True]
+    assert positions["weight"].tolist() == pytest.approx([24.0 / 64.0, 40.0 / 64.0, 1.0])
@@ -66,7 +66,8 @@ export default function MovementsPage() {
         headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
       });
       if (response.ok) {
-        setMovements(await response.json());
+        const data = await response.json();
+        setMovements(data.movements || data);
       }
     } catch (error) {
       console.error('Erro ao buscar movimentações:', error);
@@ -10,11 +10,20 @@ import { ExportService } from '@/lib/exportService';
 export default function DashboardPage() {
   const [loading, setLoading] = useState(false);
   const [token, setToken] = useState<string | null>(null);
+  const [summary, setSummary] = useState<any>(null);
 
   useEffect(() => {
     setToken(localStorage.getItem('token'));
   }, []);
 
+  useEffect(() => {
+    if (!token) return;
+    fetch('/api/dashboard/summary', { headers: { 'Authorization': `Bearer ${token}` } })
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => setSummary(data))
+      .catch(error => console.error('Erro ao buscar resumo do dashboard:', error));
+  }, [token]);
+
   const handleExport = async () => {
     setLoading(true);
     try {
@@ -32,7 +41,7 @@ export default function DashboardPage() {
         ExportService.exportToExcel({
           clients: clientsData.clients || clientsData,
           allocations: allocationsData,
-          movements: movementsData,
+          movements: movementsData.movements || movementsData,
         }, 'Relatorio-InvestCase');
       }
     } catch (error) {
@@ -66,8 +75,12 @@ export default function DashboardPage() {
             <Users className="h-4 w-4 text-blue-600" />
           </CardHeader>
           <CardContent>
-            <div className="text-3xl font-bold text-gray-900">1,248</div>
-            <p className="text-xs text-gray-500 mt-1">+12% desde último mês</p>
+            <div className="text-3xl font-bold text-gray-900">
+              {summary ? (summary.active_clients + summary.inactive_clients).toLocaleString('pt-BR') : '-'}
+            </div>
+            <p className="text-xs text-gray-500 mt-1">
+              {summary ? `${summary.active_clients} ativos, ${summary.inactive_clients} inativos` : 'Carregando...'}
+            </p>
           </CardContent>
         </Card>
 
@@ -77,8 +90,12 @@ export default function DashboardPage() {
             <DollarSign className="h-4 w-4 text-green-600" />
           </CardHeader>
           <CardContent>
-            <div className="text-3xl font-bold text-gray-900">R$ 45.2M</div>
-            <p className="text-xs text-gray-500 mt-1">+8.1% desde último mês</p>
+            <div className="text-3xl font-bold text-gray-900">
+              {summary ? summary.total_invested.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' }) : '-'}
+            </div>
+            <p className="text-xs text-gray-500 mt-1">
+              {summary ? `Fluxo líquido: ${summary.net_flow.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' })}` : 'Carregando...'}
+            </p>
           </CardContent>
         </Card>
 
@@ -23,7 +23,7 @@ export default function TransactionsPage() {
 
         if (transactionsRes.ok) {
           const data = await transactionsRes.json();
-          setTransactions(data);
+          setTransactions(data.movements || data);
         }
 
         if (clientsRes.ok) {